@@ -13,13 +13,17 @@ Connects to Neo4j Aura (cloud-hosted) for graph storage.
 """
 
 import os
-import json
 import asyncio
-from typing import Optional, Dict, Any, List
-from datetime import datetime
-from fastapi import FastAPI, HTTPException, Header, BackgroundTasks
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
+from datetime import datetime, timezone
+from fastapi import FastAPI, HTTPException, Header, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from neo4j import AsyncGraphDatabase
+from cachetools import TTLCache
+import orjson
+import ahocorasick
 import logging
 
 # Configure logging
@@ -46,16 +50,62 @@ API_KEY = os.environ.get("API_KEY", "")
 NEO4J_URI = os.environ.get("NEO4J_URI", "")
 NEO4J_USER = os.environ.get("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD", "")
+EPISODE_CONCURRENCY = int(os.environ.get("EPISODE_CONCURRENCY", "8"))
 
-# Graphiti client (lazy initialization)
+# Claim tokens that mark a statement as a denial
+NEG_SET = frozenset({'not', 'never', "didn't", "wasn't"})
+
+# Episodes mentioning each entity, optionally cut off at $as_of, in one round-trip
+TIMELINE_BATCH_QUERY = """
+UNWIND $entities AS entity_name
+OPTIONAL MATCH (ep:Episodic)-[:MENTIONS]->(:Entity {name: entity_name})
+WHERE $as_of IS NULL OR ep.created_at <= $as_of
+WITH entity_name, ep
+ORDER BY ep.created_at
+RETURN entity_name,
+       collect(ep {.name, .content, timestamp: toString(ep.created_at)}) AS episodes
+"""
+
+# Bulk upserts straight into Graphiti's schema, one transaction per batch.
+# Property values must be Neo4j primitives (or lists of them). Embeddings come
+# from the Graphiti client's embedder, so similarity search finds these rows.
+ENTITY_MERGE_QUERY = """
+UNWIND $rows AS r
+MERGE (e:Entity {name: r.name})
+ON CREATE SET e.uuid = randomUUID(), e.group_id = '', e.created_at = datetime(), e.summary = ''
+SET e += r.props, e.type = r.type
+WITH e, r
+CALL db.create.setNodeVectorProperty(e, "name_embedding", r.name_embedding)
+RETURN count(e) AS rows
+"""
+
+RELATIONSHIP_MERGE_QUERY = """
+UNWIND $rows AS r
+MATCH (s:Entity {name: r.source}), (t:Entity {name: r.target})
+MERGE (s)-[x:RELATES_TO {name: r.type}]->(t)
+ON CREATE SET x.uuid = randomUUID(), x.group_id = '', x.created_at = datetime(), x.episodes = []
+SET x += r.props, x.fact = r.fact
+WITH x, r
+CALL db.create.setRelationshipVectorProperty(x, "fact_embedding", r.fact_embedding)
+RETURN count(x) AS rows
+"""
+
+# Graphiti client (lazy initialization; the lock keeps concurrent cold-start
+# requests from each building their own client and connection pool)
 graphiti_client = None
+_init_lock = asyncio.Lock()
 
-def get_graphiti():
+async def get_graphiti():
     """Lazy initialize Graphiti client"""
     global graphiti_client
-    if graphiti_client is None:
+    if graphiti_client is not None:
+        return graphiti_client
+    async with _init_lock:
+        if graphiti_client is not None:
+            return graphiti_client
         try:
             from graphiti_core import Graphiti
+            from graphiti_core.driver.neo4j_driver import Neo4jDriver
             from graphiti_core.llm_client import OpenAIClient
             
             # Use OpenAI-compatible endpoint (LiteLLM or direct)
@@ -64,10 +114,17 @@ def get_graphiti():
                 base_url=os.environ.get("LLM_BASE_URL", "https://api.openai.com/v1")
             )
             
+            # Graphiti runs on the shared driver, so the process keeps one
+            # Neo4j pool. Neo4jDriver always builds its own client; it is
+            # swapped out before the index-build task it schedules can run,
+            # and closed before it ever connects.
+            shared = get_driver()
+            graph_driver = Neo4jDriver(uri=NEO4J_URI, user=NEO4J_USER, password=NEO4J_PASSWORD)
+            own_client, graph_driver.client = graph_driver.client, shared
+            await own_client.close()
+            
             graphiti_client = Graphiti(
-                uri=NEO4J_URI,
-                user=NEO4J_USER,
-                password=NEO4J_PASSWORD,
+                graph_driver=graph_driver,
                 llm_client=llm_client
             )
             logger.info("Graphiti client initialized successfully")
@@ -76,6 +133,126 @@ def get_graphiti():
             raise
     return graphiti_client
 
+@app.on_event("startup")
+async def init_driver():
+    """Create the shared Neo4j async driver (one connection pool per process)"""
+    app.state.driver = None
+    if NEO4J_URI:
+        app.state.driver = AsyncGraphDatabase.driver(
+            NEO4J_URI,
+            auth=(NEO4J_USER, NEO4J_PASSWORD),
+            max_connection_pool_size=50
+        )
+        logger.info("Neo4j driver initialized successfully")
+
+@app.on_event("shutdown")
+async def close_driver():
+    # Closing Graphiti closes the shared driver it runs on
+    if graphiti_client is not None:
+        await graphiti_client.close()
+    elif app.state.driver is not None:
+        await app.state.driver.close()
+
+def get_driver():
+    """The shared Neo4j async driver used by both Graphiti and the direct Cypher helpers"""
+    driver = app.state.driver
+    if driver is None:
+        raise RuntimeError("NEO4J_URI not configured")
+    return driver
+
+async def run_query(query: str, **params) -> List[Dict[str, Any]]:
+    """Run a Cypher query and return all records as dicts"""
+    driver = get_driver()
+    async with driver.session() as session:
+        result = await session.run(query, params)
+        return await result.data()
+
+async def run_write(query: str, **params) -> Dict[str, int]:
+    """Run a Cypher write in a single managed transaction and return its counters"""
+    driver = get_driver()
+    
+    async def work(tx):
+        result = await tx.run(query, params)
+        return (await result.consume()).counters
+    
+    async with driver.session() as session:
+        counters = await session.execute_write(work)
+    return {
+        "nodes_created": counters.nodes_created,
+        "relationships_created": counters.relationships_created,
+        "properties_set": counters.properties_set
+    }
+
+async def embed_texts(client: Any, texts: List[str]) -> List[List[float]]:
+    """Embed a batch of names or facts the way Graphiti does for its own writes"""
+    if not texts:
+        return []
+    return await client.embedder.create_batch([t.replace('\n', ' ') for t in texts])
+
+def parse_as_of(value: str) -> datetime:
+    """Parse an ISO timestamp, treating naive values as UTC"""
+    as_of = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    return as_of
+
+class Hit(NamedTuple):
+    """Graphiti search result normalized once at the API boundary"""
+    name: str
+    facts: List[str]
+    score: float
+    created_at: Optional[datetime]
+
+def adapt(r: Any) -> Hit:
+    """Convert a Graphiti search result (edge or node) into a Hit"""
+    facts = getattr(r, 'facts', None)
+    if facts is None:
+        fact = getattr(r, 'fact', None)
+        facts = [fact] if fact else []
+    return Hit(
+        getattr(r, 'name', None) or str(r),
+        facts,
+        getattr(r, 'score', 1.0),
+        getattr(r, 'created_at', None)
+    )
+
+# Search result cache keyed by (query, limit, generation). Writes bump the
+# generation so results fetched before an add are never served after it.
+_search_cache: TTLCache = TTLCache(maxsize=2048, ttl=60)
+_search_inflight: Dict[Tuple[str, int, int], asyncio.Future] = {}
+_cache_generation = 0
+
+def invalidate_search_cache():
+    """Drop cached search results after a graph write"""
+    global _cache_generation
+    _cache_generation += 1
+    _search_cache.clear()
+
+async def cached_search(client: Any, query: str, num_results: int) -> Tuple[List[Hit], bool]:
+    """Search via Graphiti with a TTL cache; returns (hits, cache_hit)"""
+    key = (query, num_results, _cache_generation)
+    hits = _search_cache.get(key)
+    if hits is not None:
+        return hits, True
+    
+    # Concurrent misses for the same key share one Neo4j round-trip
+    pending = _search_inflight.get(key)
+    if pending is None:
+        async def fetch() -> List[Hit]:
+            try:
+                results = await client.search(query=query, num_results=num_results)
+                hits = [adapt(r) for r in results]
+                if key[2] == _cache_generation:
+                    _search_cache[key] = hits
+                return hits
+            finally:
+                _search_inflight.pop(key, None)
+        
+        pending = asyncio.ensure_future(fetch())
+        _search_inflight[key] = pending
+    
+    return await asyncio.shield(pending), False
+
 def verify_api_key(authorization: Optional[str] = Header(None)):
     """Verify API key from Authorization header"""
     if not API_KEY:
@@ -87,36 +264,66 @@ def verify_api_key(authorization: Optional[str] = Header(None)):
         raise HTTPException(status_code=403, detail="Invalid API key")
 
 # Request/Response Models
-class EntityRequest(BaseModel):
+class RequestModel(BaseModel):
+    """Base for request bodies: tolerate unknown fields, trim string input"""
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True)
+
+class EntityRequest(RequestModel):
     name: str
     entity_type: str
     properties: Dict[str, Any] = {}
     source_description: Optional[str] = None
 
-class RelationshipRequest(BaseModel):
+class RelationshipRequest(RequestModel):
     source_entity: str
     target_entity: str
     relationship_type: str
     properties: Dict[str, Any] = {}
     source_description: Optional[str] = None
 
-class SearchRequest(BaseModel):
+class EntityBatchRequest(RequestModel):
+    entities: List[EntityRequest]
+    extract: bool = False  # True: ingest as episodes so the LLM extracts facts
+
+class RelationshipBatchRequest(RequestModel):
+    relationships: List[RelationshipRequest]
+    extract: bool = False
+
+class SearchRequest(RequestModel):
     query: str
     entity_types: Optional[List[str]] = None
     limit: int = 10
 
-class TimelineRequest(BaseModel):
+class TimelineRequest(RequestModel):
     entity_name: str
     start_date: Optional[str] = None
     end_date: Optional[str] = None
 
-class ContradictionRequest(BaseModel):
+class TimelineBatchRequest(RequestModel):
+    entities: List[str]
+    as_of: Optional[str] = None  # ISO format
+
+class ContradictionRequest(RequestModel):
     entity_name: str
     claim: str
 
-class AsOfRequest(BaseModel):
+class AsOfRequest(RequestModel):
     query: str
     as_of_date: str  # ISO format
+    limit: int = 20
+
+class SearchResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    name: str
+    score: Optional[float] = None
+    facts: List[str] = []
+
+class SearchResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    success: bool
+    query: str
+    results: List[SearchResult]
+    count: int
 
 # Health check
 @app.get("/health")
@@ -125,155 +332,275 @@ async def health_check():
         "status": "healthy",
         "service": "graphiti-api",
         "neo4j_configured": bool(NEO4J_URI),
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 # Entity operations
+async def gather_bounded(coros):
+    """Await episode ingestions concurrently, at most EPISODE_CONCURRENCY at a time"""
+    semaphore = asyncio.Semaphore(EPISODE_CONCURRENCY)
+    
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(bounded(c) for c in coros))
+
+async def add_entity_episode(client: Any, request: EntityRequest, now: datetime):
+    """Ingest one entity as a Graphiti episode"""
+    await client.add_episode(
+        name=request.name,
+        episode_body=orjson.dumps({
+            "type": request.entity_type,
+            "properties": request.properties
+        }).decode(),
+        source_description=request.source_description or f"Entity: {request.name}",
+        reference_time=now
+    )
+
 @app.post("/entity/add")
 async def add_entity(request: EntityRequest, authorization: str = Header(None)):
     verify_api_key(authorization)
+    now = datetime.now(timezone.utc)
     try:
-        client = get_graphiti()
+        client = await get_graphiti()
         
         # Add entity episode
-        await client.add_episode(
-            name=request.name,
-            episode_body=json.dumps({
-                "type": request.entity_type,
-                "properties": request.properties
-            }),
-            source_description=request.source_description or f"Entity: {request.name}",
-            reference_time=datetime.utcnow()
-        )
+        await add_entity_episode(client, request, now)
+        invalidate_search_cache()
         
         return {
             "success": True,
             "entity": request.name,
             "type": request.entity_type,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now.isoformat()
         }
     except Exception as e:
         logger.error(f"Error adding entity: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/entity/search")
-async def search_entities(request: SearchRequest, authorization: str = Header(None)):
+@app.post("/entity/add_batch")
+async def add_entity_batch(request: EntityBatchRequest, authorization: str = Header(None)):
     verify_api_key(authorization)
+    now = datetime.now(timezone.utc)
     try:
-        client = get_graphiti()
-        
-        results = await client.search(
-            query=request.query,
-            num_results=request.limit
-        )
+        client = await get_graphiti()
+        if request.extract:
+            await gather_bounded(add_entity_episode(client, r, now) for r in request.entities)
+            stats = {}
+        else:
+            # Plain upsert: one embedding call, then one UNWIND MERGE transaction for the whole batch
+            embeddings = await embed_texts(client, [r.name for r in request.entities])
+            stats = await run_write(
+                ENTITY_MERGE_QUERY,
+                rows=[
+                    {"name": r.name, "type": r.entity_type, "props": r.properties, "name_embedding": embedding}
+                    for r, embedding in zip(request.entities, embeddings)
+                ]
+            )
+        invalidate_search_cache()
         
         return {
             "success": True,
-            "query": request.query,
-            "results": [
-                {
-                    "name": r.name if hasattr(r, 'name') else str(r),
-                    "score": r.score if hasattr(r, 'score') else 1.0,
-                    "facts": r.facts if hasattr(r, 'facts') else []
-                }
-                for r in results
-            ],
-            "count": len(results)
+            "count": len(request.entities),
+            **stats,
+            "timestamp": now.isoformat()
         }
+    except Exception as e:
+        logger.error(f"Error adding entity batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/entity/search", response_model=SearchResponse)
+async def search_entities(request: SearchRequest, response: Response, authorization: str = Header(None)):
+    verify_api_key(authorization)
+    try:
+        client = await get_graphiti()
+        
+        hits, cache_hit = await cached_search(client, request.query, request.limit)
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+        
+        return SearchResponse(
+            success=True,
+            query=request.query,
+            results=[
+                SearchResult(name=h.name, score=h.score, facts=h.facts)
+                for h in hits
+            ],
+            count=len(hits)
+        )
     except Exception as e:
         logger.error(f"Error searching entities: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/entity/timeline")
 async def get_entity_timeline(request: TimelineRequest, authorization: str = Header(None)):
+    """Stream the timeline as NDJSON: a header line, then one line per entry"""
     verify_api_key(authorization)
     try:
-        client = get_graphiti()
+        client = await get_graphiti()
         
         # Get episodes related to entity
-        results = await client.search(
-            query=request.entity_name,
-            num_results=100
+        hits, cache_hit = await cached_search(client, request.entity_name, 100)
+        
+        async def lines():
+            yield orjson.dumps({
+                "success": True,
+                "entity": request.entity_name,
+                "count": len(hits)
+            }) + b"\n"
+            for h in hits:
+                yield orjson.dumps({
+                    "name": h.name,
+                    "facts": h.facts,
+                    "timestamp": h.created_at.isoformat() if h.created_at else None
+                }) + b"\n"
+        
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={"X-Cache": "HIT" if cache_hit else "MISS"}
         )
+    except Exception as e:
+        logger.error(f"Error getting timeline: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/entity/timeline_batch")
+async def get_entity_timeline_batch(request: TimelineBatchRequest, authorization: str = Header(None)):
+    verify_api_key(authorization)
+    try:
+        as_of = parse_as_of(request.as_of) if request.as_of else None
         
-        # Filter by date range if provided
-        timeline = []
-        for r in results:
-            entry = {
-                "name": r.name if hasattr(r, 'name') else str(r),
-                "facts": r.facts if hasattr(r, 'facts') else [],
-                "timestamp": r.created_at.isoformat() if hasattr(r, 'created_at') else None
-            }
-            timeline.append(entry)
+        records = await run_query(
+            TIMELINE_BATCH_QUERY,
+            entities=request.entities,
+            as_of=as_of
+        )
+        timelines = {rec["entity_name"]: rec["episodes"] for rec in records}
         
         return {
             "success": True,
-            "entity": request.entity_name,
-            "timeline": timeline,
-            "count": len(timeline)
+            "as_of": request.as_of,
+            "timelines": timelines,
+            "count": len(timelines)
         }
     except Exception as e:
-        logger.error(f"Error getting timeline: {e}")
+        logger.error(f"Error getting timeline batch: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Relationship operations
+async def add_relationship_episode(client: Any, request: RelationshipRequest, now: datetime):
+    """Ingest one relationship as a Graphiti episode"""
+    await client.add_episode(
+        name=f"{request.source_entity}-{request.relationship_type}-{request.target_entity}",
+        episode_body=orjson.dumps({
+            "source": request.source_entity,
+            "target": request.target_entity,
+            "type": request.relationship_type,
+            "properties": request.properties
+        }).decode(),
+        source_description=request.source_description or f"Relationship: {request.relationship_type}",
+        reference_time=now
+    )
+
 @app.post("/relationship/add")
 async def add_relationship(request: RelationshipRequest, authorization: str = Header(None)):
     verify_api_key(authorization)
+    now = datetime.now(timezone.utc)
     try:
-        client = get_graphiti()
+        client = await get_graphiti()
         
         # Add relationship as episode
-        await client.add_episode(
-            name=f"{request.source_entity}-{request.relationship_type}-{request.target_entity}",
-            episode_body=json.dumps({
-                "source": request.source_entity,
-                "target": request.target_entity,
-                "type": request.relationship_type,
-                "properties": request.properties
-            }),
-            source_description=request.source_description or f"Relationship: {request.relationship_type}",
-            reference_time=datetime.utcnow()
-        )
+        await add_relationship_episode(client, request, now)
+        invalidate_search_cache()
         
         return {
             "success": True,
             "source": request.source_entity,
             "target": request.target_entity,
             "relationship": request.relationship_type,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now.isoformat()
         }
     except Exception as e:
         logger.error(f"Error adding relationship: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/relationship/add_batch")
+async def add_relationship_batch(request: RelationshipBatchRequest, authorization: str = Header(None)):
+    verify_api_key(authorization)
+    now = datetime.now(timezone.utc)
+    try:
+        client = await get_graphiti()
+        if request.extract:
+            await gather_bounded(add_relationship_episode(client, r, now) for r in request.relationships)
+            stats = {}
+        else:
+            # Endpoints must already exist; unmatched rows are skipped
+            facts = [
+                f"{r.source_entity} {r.relationship_type} {r.target_entity}"
+                for r in request.relationships
+            ]
+            embeddings = await embed_texts(client, facts)
+            stats = await run_write(
+                RELATIONSHIP_MERGE_QUERY,
+                rows=[
+                    {
+                        "source": r.source_entity,
+                        "target": r.target_entity,
+                        "type": r.relationship_type,
+                        "props": r.properties,
+                        "fact": fact,
+                        "fact_embedding": embedding
+                    }
+                    for r, fact, embedding in zip(request.relationships, facts, embeddings)
+                ]
+            )
+        invalidate_search_cache()
+        
+        return {
+            "success": True,
+            "count": len(request.relationships),
+            **stats,
+            "timestamp": now.isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error adding relationship batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Contradiction detection
 @app.post("/detect/contradictions")
-async def detect_contradictions(request: ContradictionRequest, authorization: str = Header(None)):
+async def detect_contradictions(request: ContradictionRequest, response: Response, authorization: str = Header(None)):
     verify_api_key(authorization)
     try:
-        client = get_graphiti()
+        client = await get_graphiti()
         
         # Search for existing facts about entity
-        existing = await client.search(
-            query=request.entity_name,
-            num_results=50
-        )
+        existing, cache_hit = await cached_search(client, request.entity_name, 50)
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
         
         # Compare claim against existing facts
         # This is a simplified version - full implementation would use LLM
+        claim_lower = request.claim.lower()
+        claim_words = claim_lower.split()
+        has_negation = bool(NEG_SET.intersection(claim_words))
+
         contradictions = []
-        for r in existing:
-            facts = r.facts if hasattr(r, 'facts') else []
-            for fact in facts:
-                # Simple keyword contradiction check
-                if any(neg in request.claim.lower() for neg in ['not', 'never', 'didn\'t', 'wasn\'t']):
-                    if any(word in fact.lower() for word in request.claim.lower().split()):
-                        contradictions.append({
-                            "existing_fact": fact,
-                            "new_claim": request.claim,
-                            "confidence": 0.7
-                        })
+        if has_negation:
+            # One automaton over all claim words, one linear scan per fact
+            automaton = ahocorasick.Automaton()
+            for word in claim_words:
+                if len(word) > 2:
+                    automaton.add_word(word, word)
+
+            if len(automaton):
+                automaton.make_automaton()
+                for h in existing:
+                    for fact in h.facts:
+                        if next(automaton.iter(fact.lower()), None) is not None:
+                            contradictions.append({
+                                "existing_fact": fact,
+                                "new_claim": request.claim,
+                                "confidence": 0.7
+                            })
         
         return {
             "success": True,
@@ -289,28 +616,31 @@ async def detect_contradictions(request: ContradictionRequest, authorization: st
 # Temporal query
 @app.post("/query/as_of")
 async def query_as_of(request: AsOfRequest, authorization: str = Header(None)):
+    """Hybrid fact search limited to facts created at or before as_of_date"""
     verify_api_key(authorization)
     try:
-        client = get_graphiti()
+        from graphiti_core.search.search_filters import ComparisonOperator, DateFilter, SearchFilters
         
-        as_of = datetime.fromisoformat(request.as_of_date.replace('Z', '+00:00'))
+        client = await get_graphiti()
+        as_of = parse_as_of(request.as_of_date)
         
-        # Search with temporal context
+        # The created_at cut-off is applied inside Graphiti's search, so the
+        # limit counts only facts that pass it
         results = await client.search(
             query=request.query,
-            num_results=20
+            num_results=request.limit,
+            search_filter=SearchFilters(created_at=[[
+                DateFilter(date=as_of, comparison_operator=ComparisonOperator.less_than_equal)
+            ]])
         )
-        
-        # Filter results by as_of date
-        filtered = []
-        for r in results:
-            created = r.created_at if hasattr(r, 'created_at') else None
-            if created and created <= as_of:
-                filtered.append({
-                    "name": r.name if hasattr(r, 'name') else str(r),
-                    "facts": r.facts if hasattr(r, 'facts') else [],
-                    "timestamp": created.isoformat()
-                })
+        filtered = [
+            {
+                "name": h.name,
+                "facts": h.facts,
+                "timestamp": h.created_at.isoformat() if h.created_at else None
+            }
+            for h in map(adapt, results)
+        ]
         
         return {
             "success": True,
@@ -327,4 +657,4 @@ async def query_as_of(request: AsOfRequest, authorization: str = Header(None)):
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=port, loop="uvloop", http="httptools", workers=1)
@@ -8,7 +8,10 @@
  * Example: SMS_2401_KAILAH_001
  */
 
-import { execSync } from 'child_process';
+import { PythonWorker } from '../python-bridge';
+
+// Persistent embedding worker - model is loaded once, not per message
+const embeddingWorker = new PythonWorker('get_embedding.py');
 
 // Platform code mapping
 export const PLATFORM_CODES: Record<string, string> = {
@@ -107,9 +110,12 @@ export class ConversationSegmenter {
     let previousTimestamp: Date | null = null;
     let previousTopic: string | null = null;
 
+    // Embed all messages in one batched request
+    const embeddings = await this.getEmbeddings(sorted.map(m => m.text));
+
     for (let i = 0; i < sorted.length; i++) {
       const msg = sorted[i];
-      const embedding = await this.getEmbedding(msg.text);
+      const embedding = embeddings[i];
       const topic = this.extractTopic(msg.text);
       
       let isNewCluster = false;
@@ -211,20 +217,19 @@ export class ConversationSegmenter {
   }
 
   /**
-   * Get embedding for text using Python sentence-transformers
+   * Get embeddings for texts using the persistent sentence-transformers worker
    */
-  private async getEmbedding(text: string): Promise<number[]> {
+  private async getEmbeddings(texts: string[]): Promise<number[][]> {
     try {
-      // Call Python script to get embedding
-      const result = execSync(
-        `python3 /home/ubuntu/mcp-tool-platform/server/python-tools/get_embedding.py "${text.replace(/"/g, '\\"')}"`,
-        { encoding: 'utf-8', maxBuffer: 10 * 1024 * 1024 }
-      );
-      return JSON.parse(result);
+      const result = await embeddingWorker.request({ texts });
+      if (result.error) {
+        throw new Error(String(result.error));
+      }
+      return result.embeddings as number[][];
     } catch (error) {
-      console.error('Error getting embedding:', error);
-      // Return zero vector as fallback
-      return new Array(384).fill(0);
+      console.error('Error getting embeddings:', error);
+      // Return zero vectors as fallback
+      return texts.map(() => new Array(384).fill(0));
     }
   }
 
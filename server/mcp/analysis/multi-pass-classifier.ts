@@ -12,7 +12,7 @@
  * Advanced but not nuanced. Proper attribution. Sarcasm-aware.
  */
 
-import { exec } from 'child_process';
+import { exec, execFile } from 'child_process';
 import { promisify } from 'util';
 import * as path from 'path';
 import { priorityScreener, type PriorityScreenResult } from './priority-screener';
@@ -411,15 +411,25 @@ print(json.dumps(result))
   /**
    * Run Python NLP command
    */
-  private async runPython(command: string, args: any): Promise<any> {
-    try {
-      const cmd = `python3 ${this.nlpRunnerPath} ${command} '${JSON.stringify(args)}'`;
-      const { stdout } = await execAsync(cmd, { maxBuffer: 10 * 1024 * 1024 });
-      return JSON.parse(stdout);
-    } catch (error: any) {
-      console.error(`[MultiPassClassifier] Python command '${command}' failed:`, error.message);
-      return {};
-    }
+  private runPython(command: string, args: any): Promise<any> {
+    // Args go over stdin: no shell quoting, no argv length limit
+    return new Promise((resolve) => {
+      const child = execFile(
+        'python3',
+        [this.nlpRunnerPath, command],
+        { maxBuffer: 10 * 1024 * 1024 },
+        (error, stdout) => {
+          try {
+            if (error) throw error;
+            resolve(JSON.parse(stdout));
+          } catch (error: any) {
+            console.error(`[MultiPassClassifier] Python command '${command}' failed:`, error.message);
+            resolve({});
+          }
+        }
+      );
+      child.stdin?.end(JSON.stringify(args));
+    });
   }
   
   /**
@@ -4,12 +4,16 @@
  * Supports two execution modes:
  * 1. Remote API (default for Manus hosting) - Calls salem-forge FastAPI server
  * 2. Local subprocess (for self-hosted) - Spawns Python processes directly
+ *
+ * Long-running scripts (embeddings, graph operations) can instead be driven
+ * through a PythonWorker, which keeps one Python process alive and exchanges
+ * JSON lines over stdio.
  * 
  * Set PYTHON_API_URL environment variable to use remote mode.
  * If not set, falls back to local subprocess, then JS fallbacks.
  */
 
-import { spawn } from 'child_process';
+import { spawn, type ChildProcessWithoutNullStreams } from 'child_process';
 import { join } from 'path';
 
 const PYTHON_TOOLS_DIR = join(process.cwd(), 'server', 'python-tools');
@@ -94,11 +98,16 @@ async function callPythonLocal(
     
     const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
     
-    const proc = spawn(pythonCmd, [NLP_RUNNER, command, JSON.stringify(args)], {
+    // Args go over stdin so batch payloads are not limited by argv size
+    const proc = spawn(pythonCmd, [NLP_RUNNER, command], {
       cwd: PYTHON_TOOLS_DIR,
       timeout,
       stdio: ['pipe', 'pipe', 'pipe'],
     });
+    proc.stdin.on('error', () => {
+      // Surfaced through the 'error'/'close' handlers below
+    });
+    proc.stdin.end(JSON.stringify(args));
 
     let stdout = '';
     let stderr = '';
@@ -148,6 +157,159 @@ async function callPythonLocal(
   });
 }
 
+// ============================================================================
+// Persistent Worker Execution (long-lived Python process over stdio)
+// ============================================================================
+
+interface PendingRequest {
+  resolve: (value: Record<string, unknown>) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+/**
+ * Long-lived Python worker speaking JSON lines over stdio.
+ *
+ * Each request is written as one line `{id, ...payload}` and the worker
+ * answers with one line carrying the same `id`. Model loads and database
+ * connections are paid once per process instead of once per call. The
+ * process is started on first use and stopped after `idleTimeout` ms
+ * without pending requests.
+ */
+export class PythonWorker {
+  private proc: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<number, PendingRequest>();
+  private nextId = 1;
+  private buffer = '';
+  private idleTimer: NodeJS.Timeout | null = null;
+
+  constructor(
+    private script: string,
+    private timeout = 30000,
+    private idleTimeout = 60000
+  ) {}
+
+  /**
+   * Send a request and resolve with the worker's response line (minus `id`)
+   */
+  request(payload: Record<string, unknown>): Promise<Record<string, unknown>> {
+    const proc = this.start();
+    const id = this.nextId++;
+
+    if (this.idleTimer) {
+      clearTimeout(this.idleTimer);
+      this.idleTimer = null;
+    }
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Python worker timeout: ${this.script}`));
+        this.scheduleIdleStop();
+      }, this.timeout);
+
+      this.pending.set(id, { resolve, reject, timer });
+      proc.stdin.write(JSON.stringify({ id, ...payload }) + '\n');
+    });
+  }
+
+  /**
+   * Stop the worker process and reject anything still in flight
+   */
+  close(): void {
+    if (this.idleTimer) {
+      clearTimeout(this.idleTimer);
+      this.idleTimer = null;
+    }
+    if (this.proc) {
+      this.proc.stdin.end();
+      this.proc.kill();
+      this.proc = null;
+    }
+    this.rejectAll(new Error(`Python worker closed: ${this.script}`));
+  }
+
+  private start(): ChildProcessWithoutNullStreams {
+    if (this.proc) return this.proc;
+
+    const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
+    const proc = spawn(pythonCmd, [join(PYTHON_TOOLS_DIR, this.script)], {
+      cwd: PYTHON_TOOLS_DIR,
+      stdio: ['pipe', 'pipe', 'pipe'],
+    });
+
+    proc.stdin.on('error', (err) => {
+      this.rejectAll(new Error(`Python worker stdin error: ${err.message}`));
+    });
+
+    proc.stdout.setEncoding('utf8');
+    proc.stdout.on('data', (data: string) => this.onData(data));
+
+    proc.stderr.on('data', (data) => {
+      console.warn(`[${this.script}] ${data.toString().trim()}`);
+    });
+
+    proc.on('exit', (code) => {
+      if (this.proc === proc) this.proc = null;
+      this.rejectAll(new Error(`Python worker exited with code ${code}: ${this.script}`));
+    });
+
+    proc.on('error', (err) => {
+      if (this.proc === proc) this.proc = null;
+      this.rejectAll(new Error(`Python not available: ${err.message}`));
+    });
+
+    this.proc = proc;
+    this.buffer = '';
+    return proc;
+  }
+
+  private onData(chunk: string): void {
+    this.buffer += chunk;
+    let newline: number;
+
+    while ((newline = this.buffer.indexOf('\n')) !== -1) {
+      const line = this.buffer.slice(0, newline).trim();
+      this.buffer = this.buffer.slice(newline + 1);
+      if (!line) continue;
+
+      let message: Record<string, unknown>;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        console.warn(`[${this.script}] Unparseable output: ${line}`);
+        continue;
+      }
+
+      const { id, ...rest } = message;
+      const request = this.pending.get(id as number);
+      if (!request) continue;
+
+      clearTimeout(request.timer);
+      this.pending.delete(id as number);
+      request.resolve(rest);
+    }
+
+    this.scheduleIdleStop();
+  }
+
+  private scheduleIdleStop(): void {
+    if (this.pending.size > 0 || this.idleTimer || !this.proc) return;
+    this.idleTimer = setTimeout(() => {
+      this.idleTimer = null;
+      if (this.pending.size === 0) this.close();
+    }, this.idleTimeout);
+  }
+
+  private rejectAll(error: Error): void {
+    this.pending.forEach((request) => {
+      clearTimeout(request.timer);
+      request.reject(error);
+    });
+    this.pending.clear();
+  }
+}
+
 // ============================================================================
 // Main Entry Point - Auto-selects execution mode
 // ============================================================================
@@ -185,6 +347,27 @@ export async function callPython(
   return localResult;
 }
 
+/**
+ * Decode int8-quantized embeddings returned by `embed_text` with `quantize: true`.
+ * Each float component is approximately `vectors[i][j] * scales[i]`.
+ */
+export function decodeInt8Embeddings(data: {
+  embeddings_int8: string;
+  scales: number[];
+  shape: [number, number];
+}): { vectors: Int8Array[]; scales: number[] } {
+  const bytes = Buffer.from(data.embeddings_int8, 'base64');
+  const all = new Int8Array(bytes.buffer, bytes.byteOffset, bytes.length);
+  const [rows, dims] = data.shape;
+  
+  const vectors: Int8Array[] = [];
+  for (let i = 0; i < rows; i++) {
+    vectors.push(all.subarray(i * dims, (i + 1) * dims));
+  }
+  
+  return { vectors, scales: data.scales };
+}
+
 /**
  * Check if Python execution is available (remote or local)
  */
@@ -306,7 +489,37 @@ export async function extractEntities(
     };
   }
   
-  // JS fallback: simple regex patterns
+  return { entities: jsExtractEntities(text), method: 'js_fallback' };
+}
+
+/**
+ * Extract named entities from many texts with a single Python call
+ */
+export async function extractEntitiesBatch(
+  texts: string[],
+  types?: string[]
+): Promise<Array<{
+  entities: Array<{ text: string; type: string; start: number; end: number; confidence: number }>;
+  method: string;
+}>> {
+  const result = await callPython('extract_entities_batch', { texts, types });
+  
+  if (result.success && result.data) {
+    return result.data.results as Array<{
+      entities: Array<{ text: string; type: string; start: number; end: number; confidence: number }>;
+      method: string;
+    }>;
+  }
+  
+  return texts.map(text => ({ entities: jsExtractEntities(text), method: 'js_fallback' }));
+}
+
+/**
+ * JS fallback for entity extraction: simple regex patterns
+ */
+function jsExtractEntities(
+  text: string
+): Array<{ text: string; type: string; start: number; end: number; confidence: number }> {
   const entities: Array<{ text: string; type: string; start: number; end: number; confidence: number }> = [];
   
   // Email pattern
@@ -358,7 +571,7 @@ export async function extractEntities(
     });
   }
   
-  return { entities, method: 'js_fallback' };
+  return entities;
 }
 
 /**
@@ -1,22 +1,215 @@
 #!/usr/bin/env python3
 """
-Get sentence embedding using sentence-transformers
+Sentence embedding worker (all-MiniLM-L6-v2)
+
+Runs as a long-lived process so the model is loaded once. Reads JSON lines
+from stdin and writes one JSON line per request to stdout:
+
+  in:  {"id": 1, "texts": ["first", "second"]}
+  out: {"id": 1, "embeddings": [[...], [...]]}
+
+Requests arriving within BATCH_WINDOW_S of each other are encoded together,
+in forward passes of at most ENCODE_BATCH_SIZE texts.
+
+Uses ONNX Runtime when an exported model is available in EMBEDDING_ONNX_DIR:
+  optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 <dir>
+Otherwise falls back to sentence-transformers.
+
+Legacy one-shot usage:
+  python get_embedding.py "<text>"
 """
 
+import os
 import sys
 import json
-from sentence_transformers import SentenceTransformer
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+ONNX_DIR = os.environ.get('EMBEDDING_ONNX_DIR', '')
+MAX_LENGTH = 256
+BATCH_WINDOW_S = 0.005
+# Texts per ONNX forward pass; bounds padding and activation memory
+ENCODE_BATCH_SIZE = 64
+EMBEDDING_DIM = 384
+
+
+def _physical_cores() -> int:
+    try:
+        import psutil
+        return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    except ImportError:
+        return os.cpu_count() or 1
+
+
+class OnnxEncoder:
+    """MiniLM encoder on ONNX Runtime with mean pooling + L2 normalization."""
+
+    def __init__(self, model_dir: str):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = _physical_cores()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, 'model.onnx'),
+            sess_options=so,
+            providers=['CPUExecutionProvider']
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: List[str], batch_size: int = ENCODE_BATCH_SIZE) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_LENGTH,
+                return_tensors='np'
+            )
+            feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            mask = enc['attention_mask'][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            batches.append(pooled / np.clip(norms, 1e-12, None))
+        return np.vstack(batches) if batches else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+
+class SentenceTransformerEncoder:
+    """Fallback encoder when no exported ONNX model is available."""
+
+    def __init__(self):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(MODEL_NAME)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+
+def load_encoder():
+    """Load the fastest available encoder (loaded once per process)."""
+    if ONNX_DIR and os.path.exists(os.path.join(ONNX_DIR, 'model.onnx')):
+        try:
+            return OnnxEncoder(ONNX_DIR)
+        except ImportError as e:
+            print(f"[get_embedding] ONNX Runtime unavailable ({e}), using sentence-transformers",
+                  file=sys.stderr)
+    return SentenceTransformerEncoder()
+
+
+# The reader thread reports bad lines while the main loop writes results
+_write_lock = threading.Lock()
+
+
+def _write(obj: Dict[str, Any]):
+    with _write_lock:
+        sys.stdout.write(json.dumps(obj) + '\n')
+        sys.stdout.flush()
+
+
+def _request_error(req: Any) -> Optional[str]:
+    """Why a parsed line cannot be batched, or None if it can."""
+    if not isinstance(req, dict):
+        return 'Request must be a JSON object'
+    texts = req.get('texts')
+    if texts is not None and not (isinstance(texts, list) and all(isinstance(t, str) for t in texts)):
+        return "'texts' must be a list of strings"
+    return None
+
+
+def _read_requests(requests: queue.Queue):
+    """Reader thread: parse stdin lines and hand them to the batching loop."""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+        except json.JSONDecodeError as e:
+            _write({'id': None, 'error': f'Invalid JSON: {e}'})
+            continue
+        # Bad requests are answered here so they never join a batch
+        error = _request_error(req)
+        if error is not None:
+            _write({'id': req.get('id') if isinstance(req, dict) else None, 'error': error})
+            continue
+        requests.put(req)
+    requests.put(None)
+
+
+def _encode_one(encoder, req: Dict[str, Any]):
+    texts = req.get('texts') or []
+    try:
+        embeddings = encoder.encode(texts) if texts else np.empty((0, 0))
+    except Exception as e:
+        _write({'id': req.get('id'), 'error': str(e)})
+        return
+    _write({'id': req.get('id'), 'embeddings': embeddings.tolist()})
+
+
+def serve(encoder):
+    """Worker loop: gather requests for up to BATCH_WINDOW_S, encode them in one pass."""
+    requests: queue.Queue = queue.Queue()
+    threading.Thread(target=_read_requests, args=(requests,), daemon=True).start()
+
+    done = False
+    while not done:
+        first = requests.get()
+        if first is None:
+            break
+
+        batch = [first]
+        deadline = time.monotonic() + BATCH_WINDOW_S
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is None:
+                done = True
+                break
+            batch.append(req)
+
+        texts: List[str] = []
+        for req in batch:
+            texts.extend(req.get('texts') or [])
+
+        try:
+            embeddings = encoder.encode(texts) if texts else np.empty((0, 0))
+        except Exception:
+            # Retry one request at a time so only the one that fails gets the error
+            for req in batch:
+                _encode_one(encoder, req)
+            continue
+
+        offset = 0
+        for req in batch:
+            count = len(req.get('texts') or [])
+            _write({
+                'id': req.get('id'),
+                'embeddings': embeddings[offset:offset + count].tolist()
+            })
+            offset += count
 
-# Load model (cached after first run)
-model = SentenceTransformer('all-MiniLM-L6-v2')
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print(json.dumps({'error': 'No text provided'}))
-        sys.exit(1)
-    
-    text = sys.argv[1]
-    embedding = model.encode([text])[0]
-    
-    # Output as JSON array
-    print(json.dumps(embedding.tolist()))
+    encoder = load_encoder()
+
+    if len(sys.argv) > 1:
+        embedding = encoder.encode([sys.argv[1]])[0]
+        print(json.dumps(embedding.tolist()))
+    else:
+        serve(encoder)
@@ -2,6 +2,16 @@
 """
 Graphiti Runner - Python bridge for temporal graph operations
 Requires: graphiti-core, neo4j
+
+Usage:
+  python graphiti_runner.py <command> <args_json>   # one-shot
+  python graphiti_runner.py                         # persistent worker
+
+In worker mode the process keeps one Graphiti client (and Neo4j connection
+pool) alive and reads JSON lines from stdin:
+  in:  {"id": 1, "command": "search_entities", "args": {...}}
+  out: {"id": 1, "success": true, "data": {...}}
+Drive it from Node with PythonWorker('graphiti_runner.py').
 """
 
 import sys
@@ -9,16 +19,51 @@ import json
 import os
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 try:
     from graphiti_core import Graphiti
     from graphiti_core.nodes import EntityNode, EpisodeNode
     from graphiti_core.edges import EntityEdge
+    from neo4j import AsyncGraphDatabase
     GRAPHITI_AVAILABLE = True
 except ImportError:
     GRAPHITI_AVAILABLE = False
 
+try:
+    from graphiti_core.driver.neo4j_driver import Neo4jDriver
+except ImportError:
+    # graphiti-core before the pluggable driver API builds its own Neo4j driver
+    Neo4jDriver = None
+
+# Pool for the worker's long-lived client; acquisition waits fail fast instead of hanging
+NEO4J_MAX_POOL_SIZE = int(os.getenv('NEO4J_MAX_POOL_SIZE', '50'))
+NEO4J_ACQUISITION_TIMEOUT_S = float(os.getenv('NEO4J_ACQUISITION_TIMEOUT_S', '30'))
+
+def loads(data):
+    """Parse JSON (orjson when available)"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def write_json(obj):
+    """Write one JSON document and a newline to stdout (orjson when available)"""
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(obj) + b'\n')
+        sys.stdout.buffer.flush()
+    else:
+        print(json.dumps(obj), flush=True)
+
+# Cached client - one Neo4j driver and connection pool per process
+_graphiti_client = None
+
 def get_graphiti_client():
-    """Initialize Graphiti client with Neo4j connection"""
+    """Initialize Graphiti client with Neo4j connection (cached after first call)"""
+    global _graphiti_client
+    if _graphiti_client is not None:
+        return _graphiti_client
+    
     neo4j_url = os.getenv('NEO4J_URL', 'bolt://localhost:7687')
     neo4j_user = os.getenv('NEO4J_USERNAME', 'neo4j')
     neo4j_password = os.getenv('NEO4J_PASSWORD', 'password')
@@ -26,11 +71,25 @@ def get_graphiti_client():
     if not GRAPHITI_AVAILABLE:
         raise ImportError("graphiti-core not installed. Run: pip install graphiti-core neo4j")
     
-    return Graphiti(
-        neo4j_uri=neo4j_url,
-        neo4j_user=neo4j_user,
-        neo4j_password=neo4j_password
+    if Neo4jDriver is None:
+        _graphiti_client = Graphiti(
+            neo4j_uri=neo4j_url,
+            neo4j_user=neo4j_user,
+            neo4j_password=neo4j_password
+        )
+        return _graphiti_client
+    
+    graph_driver = Neo4jDriver(uri=neo4j_url, user=neo4j_user, password=neo4j_password)
+    # Neo4jDriver takes no pool options; its default client has not connected
+    # yet, so swap in one built with them before Graphiti uses it
+    graph_driver.client = AsyncGraphDatabase.driver(
+        neo4j_url,
+        auth=(neo4j_user, neo4j_password),
+        max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+        connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT_S
     )
+    _graphiti_client = Graphiti(graph_driver=graph_driver)
+    return _graphiti_client
 
 def add_entity(args):
     """Add an entity to the temporal graph"""
@@ -192,43 +251,72 @@ def query_as_of(args):
         }
     }
 
-def main():
-    if len(sys.argv) < 3:
-        print(json.dumps({
-            'success': False,
-            'error': 'Usage: graphiti_runner.py <command> <args_json>'
-        }))
-        sys.exit(1)
-    
-    command = sys.argv[1]
-    args = json.loads(sys.argv[2])
-    
+COMMANDS = {
+    'add_entity': add_entity,
+    'add_relationship': add_relationship,
+    'search_entities': search_entities,
+    'get_entity_timeline': get_entity_timeline,
+    'detect_contradictions': detect_contradictions,
+    'query_as_of': query_as_of,
+}
+
+def run_command(command, args):
+    """Dispatch a command and wrap the result in the response envelope"""
     try:
-        if command == 'add_entity':
-            result = add_entity(args)
-        elif command == 'add_relationship':
-            result = add_relationship(args)
-        elif command == 'search_entities':
-            result = search_entities(args)
-        elif command == 'get_entity_timeline':
-            result = get_entity_timeline(args)
-        elif command == 'detect_contradictions':
-            result = detect_contradictions(args)
-        elif command == 'query_as_of':
-            result = query_as_of(args)
+        if command in COMMANDS:
+            result = COMMANDS[command](args)
         else:
             result = {'error': f'Unknown command: {command}'}
         
-        print(json.dumps({
+        return {
             'success': True,
             'data': result
-        }))
+        }
     except Exception as e:
-        print(json.dumps({
+        return {
             'success': False,
             'error': str(e),
             'type': type(e).__name__
-        }))
+        }
+
+def serve():
+    """Worker loop: one JSON request per stdin line, one response per stdout line"""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            request = loads(line)
+        except json.JSONDecodeError as e:
+            write_json({'id': None, 'success': False, 'error': f'Invalid JSON: {e}'})
+            continue
+        if not isinstance(request, dict):
+            write_json({'id': None, 'success': False, 'error': 'Request must be a JSON object'})
+            continue
+        
+        response = run_command(request.get('command'), request.get('args') or {})
+        response['id'] = request.get('id')
+        write_json(response)
+
+def main():
+    if len(sys.argv) == 1:
+        serve()
+        return
+    
+    if len(sys.argv) < 3:
+        write_json({
+            'success': False,
+            'error': 'Usage: graphiti_runner.py <command> <args_json>'
+        })
+        sys.exit(1)
+    
+    command = sys.argv[1]
+    args = loads(sys.argv[2])
+    
+    response = run_command(command, args)
+    write_json(response)
+    if not response['success']:
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -8,33 +8,87 @@ Usage:
 
 Commands:
   detect_language, extract_entities, extract_keywords, analyze_sentiment,
-  split_sentences, generate_outline, embed_text, classify_text
+  split_sentences, generate_outline, embed_text, classify_text,
+  extract_entities_batch, extract_keywords_batch, split_sentences_batch
 """
 
 import sys
+import re
 import json
+import base64
 import hashlib
-from typing import Any, Dict, List, Optional
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_default(obj: Any) -> Any:
+    """Stdlib json fallback for NumPy arrays and scalars."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(data: str) -> Any:
+    """Parse JSON (orjson when available)."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def write_json(obj: Any):
+    """Write one JSON document and a newline to stdout (orjson when available)."""
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+        sys.stdout.buffer.flush()
+    else:
+        print(json.dumps(obj, default=_json_default), flush=True)
+
+# Texts per nlp.pipe() batch in the *_batch commands
+SPACY_BATCH_SIZE = 64
+
+# Sentence boundary for the regex fallback: whitespace after ., ! or ?
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+# Sentiment lexicons (can be enhanced with transformers)
+POSITIVE_WORDS = frozenset({'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
+                            'love', 'happy', 'best', 'perfect', 'beautiful', 'awesome'})
+NEGATIVE_WORDS = frozenset({'bad', 'terrible', 'awful', 'horrible', 'hate', 'worst',
+                            'poor', 'disappointing', 'sad', 'angry', 'ugly', 'boring'})
+
+# Pipeline components each task can skip (every skipped pipe saves a pass per doc)
+SPACY_DISABLED_PIPES = {
+    "entities": ["parser", "lemmatizer", "attribute_ruler"],
+    "sentences": ["ner", "parser", "lemmatizer", "attribute_ruler", "tagger"],
+    "keywords": ["lemmatizer"],
+}
 
 # Lazy imports to speed up startup for simple commands
-_spacy_nlp = None
+_spacy_models: Dict[str, Any] = {}
 _sentence_model = None
 _langdetect = None
+_sentiment_automaton = None
 
-def get_spacy():
-    """Lazy load spaCy with English model."""
-    global _spacy_nlp
-    if _spacy_nlp is None:
+def get_spacy(task: str):
+    """Lazy load spaCy with English model, keeping only the pipes a task needs."""
+    if task not in _spacy_models:
         try:
             import spacy
             try:
-                _spacy_nlp = spacy.load("en_core_web_sm")
+                nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLED_PIPES[task])
+                if task == "sentences" and "senter" in nlp.disabled:
+                    # Parser is off, so use the lightweight sentence recognizer
+                    nlp.enable_pipe("senter")
+                _spacy_models[task] = nlp
             except OSError:
                 # Model not installed, use blank
-                _spacy_nlp = spacy.blank("en")
+                _spacy_models[task] = spacy.blank("en")
         except ImportError:
-            _spacy_nlp = None
-    return _spacy_nlp
+            return None
+    return _spacy_models[task]
 
 def get_sentence_model():
     """Lazy load sentence-transformers model."""
@@ -47,6 +101,44 @@ def get_sentence_model():
             _sentence_model = None
     return _sentence_model
 
+def get_sentiment_automaton():
+    """Lazy build one Aho-Corasick automaton over both sentiment lexicons."""
+    global _sentiment_automaton
+    if _sentiment_automaton is None:
+        try:
+            import ahocorasick
+            automaton = ahocorasick.Automaton()
+            for word in POSITIVE_WORDS:
+                automaton.add_word(word, (word, True))
+            for word in NEGATIVE_WORDS:
+                automaton.add_word(word, (word, False))
+            automaton.make_automaton()
+            _sentiment_automaton = automaton
+        except ImportError:
+            _sentiment_automaton = None
+    return _sentiment_automaton
+
+@lru_cache(maxsize=256)
+def get_category_automaton(categories: Tuple[str, ...]):
+    """Build (once per category set) an automaton mapping each lowercased pattern to (pattern, its categories)."""
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    patterns: Dict[str, List[str]] = {}
+    for cat in categories:
+        if cat:
+            cats = patterns.setdefault(cat.lower(), [])
+            if cat not in cats:
+                cats.append(cat)
+    if not patterns:
+        return None
+    automaton = ahocorasick.Automaton()
+    for pattern, cats in patterns.items():
+        automaton.add_word(pattern, (pattern, cats))
+    automaton.make_automaton()
+    return automaton
+
 def get_langdetect():
     """Lazy load langdetect."""
     global _langdetect
@@ -93,16 +185,8 @@ def detect_language(args: Dict[str, Any]) -> Dict[str, Any]:
     return {"language": "unknown", "confidence": 0.0, "method": "error"}
 
 
-def extract_entities(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract named entities using spaCy."""
-    text = args.get("text", "")
-    entity_types = args.get("types", None)  # Filter to specific types
-    
-    nlp = get_spacy()
-    if nlp is None:
-        return {"entities": [], "method": "unavailable"}
-    
-    doc = nlp(text)
+def _entities_result(doc, entity_types: Optional[List[str]]) -> Dict[str, Any]:
+    """Collect named entities from a parsed spaCy doc."""
     entities = []
     
     for ent in doc.ents:
@@ -124,62 +208,82 @@ def extract_entities(args: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def extract_keywords(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract keywords using TF-IDF-like scoring."""
+def extract_entities(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract named entities using spaCy."""
     text = args.get("text", "")
-    top_k = args.get("topK", 10)
+    entity_types = args.get("types", None)  # Filter to specific types
     
-    nlp = get_spacy()
+    nlp = get_spacy("entities")
     if nlp is None:
-        # Fallback: simple word frequency
-        words = text.lower().split()
-        freq = {}
-        for w in words:
-            if len(w) > 3:
-                freq[w] = freq.get(w, 0) + 1
-        sorted_words = sorted(freq.items(), key=lambda x: -x[1])[:top_k]
-        return {
-            "keywords": [{"keyword": w, "score": c/len(words), "frequency": c} for w, c in sorted_words],
-            "method": "frequency"
-        }
-    
-    doc = nlp(text)
+        return {"entities": [], "method": "unavailable"}
     
-    # Extract noun chunks and named entities as keywords
-    keyword_scores = {}
+    return _entities_result(nlp(text), entity_types)
+
+
+def _frequency_keywords(text: str, top_k: int) -> Dict[str, Any]:
+    """Fallback keyword extraction by simple word frequency."""
+    words = text.lower().split()
+    total = len(words)
+    freq = Counter(w for w in words if len(w) > 3)
+    sorted_words = freq.most_common(top_k)
+    return {
+        "keywords": [{"keyword": w, "score": c/total, "frequency": c} for w, c in sorted_words],
+        "method": "frequency"
+    }
+
+
+def _keywords_result(doc, top_k: int) -> Dict[str, Any]:
+    """Score noun chunks and named entities of a parsed spaCy doc as keywords."""
+    chunk_keys = (chunk.text.lower().strip() for chunk in doc.noun_chunks)
+    keyword_scores = Counter(key for key in chunk_keys if len(key) > 2)
     
-    for chunk in doc.noun_chunks:
-        key = chunk.text.lower().strip()
-        if len(key) > 2:
-            keyword_scores[key] = keyword_scores.get(key, 0) + 1
-    
-    for ent in doc.ents:
-        key = ent.text.lower().strip()
-        keyword_scores[key] = keyword_scores.get(key, 0) + 2  # Entities weighted higher
+    entity_counts = Counter(ent.text.lower().strip() for ent in doc.ents)
+    keyword_scores.update({k: 2 * c for k, c in entity_counts.items()})  # Entities weighted higher
     
     # Normalize scores
-    max_score = max(keyword_scores.values()) if keyword_scores else 1
+    top = keyword_scores.most_common(top_k)
+    max_score = top[0][1] if top else 1
     keywords = [
         {"keyword": k, "score": v/max_score, "frequency": v}
-        for k, v in sorted(keyword_scores.items(), key=lambda x: -x[1])[:top_k]
+        for k, v in top
     ]
     
     return {"keywords": keywords, "method": "spacy"}
 
 
+def extract_keywords(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract keywords using TF-IDF-like scoring."""
+    text = args.get("text", "")
+    top_k = args.get("topK", 10)
+    
+    nlp = get_spacy("keywords")
+    if nlp is None:
+        return _frequency_keywords(text, top_k)
+    
+    return _keywords_result(nlp(text), top_k)
+
+
 def analyze_sentiment(args: Dict[str, Any]) -> Dict[str, Any]:
     """Analyze sentiment of text."""
     text = args.get("text", "")
     
-    # Simple lexicon-based sentiment (can be enhanced with transformers)
-    positive_words = {'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 
-                      'love', 'happy', 'best', 'perfect', 'beautiful', 'awesome'}
-    negative_words = {'bad', 'terrible', 'awful', 'horrible', 'hate', 'worst', 
-                      'poor', 'disappointing', 'sad', 'angry', 'ugly', 'boring'}
-    
-    words = set(text.lower().split())
-    pos_count = len(words & positive_words)
-    neg_count = len(words & negative_words)
+    # Simple lexicon-based sentiment, counting distinct lexicon words found
+    automaton = get_sentiment_automaton()
+    if automaton is not None:
+        # Single pass over the text; padding keeps boundary checks in range
+        padded = f" {text.lower()} "
+        pos_found, neg_found = set(), set()
+        for end, (word, positive) in automaton.iter(padded):
+            start = end - len(word) + 1
+            if padded[start - 1].isalpha() or padded[end + 1].isalpha():
+                continue
+            (pos_found if positive else neg_found).add(word)
+        pos_count = len(pos_found)
+        neg_count = len(neg_found)
+    else:
+        words = set(text.lower().split())
+        pos_count = len(words & POSITIVE_WORDS)
+        neg_count = len(words & NEGATIVE_WORDS)
     
     total = pos_count + neg_count
     if total == 0:
@@ -204,22 +308,41 @@ def analyze_sentiment(args: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def split_sentences(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Split text into sentences."""
-    text = args.get("text", "")
-    
-    nlp = get_spacy()
-    if nlp is None:
-        # Fallback: simple split on sentence-ending punctuation
-        import re
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        return {
-            "sentences": [{"text": s.strip(), "start": 0, "end": len(s)} for s in sentences if s.strip()],
-            "count": len(sentences),
-            "method": "regex"
-        }
+def _regex_sentences(text: str) -> List[Dict[str, Any]]:
+    """Split on sentence punctuation, keeping character offsets into text."""
+    sentences = []
+    start = 0
+    bounds = [(m.start(), m.end()) for m in _SENT_SPLIT.finditer(text)]
+    bounds.append((len(text), len(text)))
+    
+    for end, next_start in bounds:
+        chunk = text[start:end]
+        stripped = chunk.strip()
+        if stripped:
+            sent_start = start + len(chunk) - len(chunk.lstrip())
+            sentences.append({
+                "text": stripped,
+                "start": sent_start,
+                "end": sent_start + len(stripped),
+                "index": len(sentences)
+            })
+        start = next_start
     
-    doc = nlp(text)
+    return sentences
+
+
+def _regex_sentences_result(text: str) -> Dict[str, Any]:
+    """Fallback sentence split result when spaCy is unavailable."""
+    sentences = _regex_sentences(text)
+    return {
+        "sentences": sentences,
+        "count": len(sentences),
+        "method": "regex"
+    }
+
+
+def _sentences_result(doc) -> Dict[str, Any]:
+    """Collect sentence spans from a parsed spaCy doc."""
     sentences = []
     
     for sent in doc.sents:
@@ -233,6 +356,18 @@ def split_sentences(args: Dict[str, Any]) -> Dict[str, Any]:
     return {"sentences": sentences, "count": len(sentences), "method": "spacy"}
 
 
+def split_sentences(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Split text into sentences."""
+    text = args.get("text", "")
+    
+    nlp = get_spacy("sentences")
+    if nlp is None:
+        # Fallback: simple split on sentence-ending punctuation
+        return _regex_sentences_result(text)
+    
+    return _sentences_result(nlp(text))
+
+
 def generate_outline(args: Dict[str, Any]) -> Dict[str, Any]:
     """Generate document outline from text structure."""
     text = args.get("text", "")
@@ -270,10 +405,34 @@ def generate_outline(args: Dict[str, Any]) -> Dict[str, Any]:
     return {"outline": outline, "depth": max_depth, "sections": len(outline)}
 
 
+def _quantize_int8(embeddings):
+    """L2-normalize, then scale each vector into int8 with its own scale factor."""
+    import numpy as np
+    
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / np.clip(norms, 1e-12, None)
+    
+    scales = np.max(np.abs(normalized), axis=1, keepdims=True) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(normalized / scales).astype(np.int8)
+    return quantized, scales[:, 0]
+
+
 def embed_text(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate embeddings for text using sentence-transformers."""
+    """Generate embeddings for text using sentence-transformers.
+    
+    With quantize=True the vectors are returned as base64 int8 bytes plus a
+    per-vector scale (value ~= int8 * scale), ~16x smaller than float JSON.
+    """
     text = args.get("text", "")
     texts = args.get("texts", [text] if text else [])
+    quantize = args.get("quantize", False)
+    
+    if not texts:
+        # Nothing to encode; np.max over an empty 1-D array would fail below
+        if quantize:
+            return {"embeddings_int8": "", "scales": [], "shape": [0, 384], "model": "all-MiniLM-L6-v2", "dimensions": 384}
+        return {"embeddings": [], "model": "all-MiniLM-L6-v2", "dimensions": 384}
     
     model = get_sentence_model()
     if model is None:
@@ -286,8 +445,19 @@ def embed_text(args: Dict[str, Any]) -> Dict[str, Any]:
     
     embeddings = model.encode(texts, convert_to_numpy=True)
     
+    if quantize:
+        quantized, scales = _quantize_int8(embeddings)
+        return {
+            "embeddings_int8": base64.b64encode(quantized.tobytes()).decode("ascii"),
+            "scales": scales.tolist(),
+            "shape": list(quantized.shape),
+            "model": "all-MiniLM-L6-v2",
+            "dimensions": quantized.shape[1]
+        }
+    
+    # Serialized straight from the ndarray by write_json
     return {
-        "embeddings": embeddings.tolist(),
+        "embeddings": embeddings,
         "model": "all-MiniLM-L6-v2",
         "dimensions": embeddings.shape[1] if len(embeddings.shape) > 1 else 384
     }
@@ -300,12 +470,24 @@ def classify_text(args: Dict[str, Any]) -> Dict[str, Any]:
     
     # Simple keyword-based classification (can be enhanced with zero-shot models)
     text_lower = text.lower()
-    scores = {}
-    
-    for cat in categories:
-        # Count occurrences of category-related words
-        score = text_lower.count(cat.lower())
-        scores[cat] = score
+    scores = dict.fromkeys(categories, 0)
+    
+    automaton = get_category_automaton(tuple(categories))
+    if automaton is not None:
+        # Count occurrences of every category in one pass over the text.
+        # Like str.count, a match overlapping the previous one of the same
+        # pattern is skipped.
+        next_start: Dict[str, int] = {}
+        for end, (pattern, cats) in automaton.iter(text_lower):
+            start = end - len(pattern) + 1
+            if start < next_start.get(pattern, 0):
+                continue
+            next_start[pattern] = end + 1
+            for cat in cats:
+                scores[cat] += 1
+    else:
+        for cat in categories:
+            scores[cat] = text_lower.count(cat.lower())
     
     total = sum(scores.values())
     if total == 0:
@@ -324,6 +506,54 @@ def classify_text(args: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# ============================================================================
+# Batch Commands - one spaCy nlp.pipe() pass over many texts
+# ============================================================================
+
+def extract_entities_batch(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract named entities from many texts in one spaCy pass."""
+    texts = args.get("texts", [])
+    entity_types = args.get("types", None)
+    
+    nlp = get_spacy("entities")
+    if nlp is None:
+        results = [{"entities": [], "method": "unavailable"} for _ in texts]
+    else:
+        docs = nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE)
+        results = [_entities_result(doc, entity_types) for doc in docs]
+    
+    return {"results": results, "count": len(results)}
+
+
+def extract_keywords_batch(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract keywords from many texts in one spaCy pass."""
+    texts = args.get("texts", [])
+    top_k = args.get("topK", 10)
+    
+    nlp = get_spacy("keywords")
+    if nlp is None:
+        results = [_frequency_keywords(text, top_k) for text in texts]
+    else:
+        docs = nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE)
+        results = [_keywords_result(doc, top_k) for doc in docs]
+    
+    return {"results": results, "count": len(results)}
+
+
+def split_sentences_batch(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Split many texts into sentences in one spaCy pass."""
+    texts = args.get("texts", [])
+    
+    nlp = get_spacy("sentences")
+    if nlp is None:
+        results = [_regex_sentences_result(text) for text in texts]
+    else:
+        docs = nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE)
+        results = [_sentences_result(doc) for doc in docs]
+    
+    return {"results": results, "count": len(results)}
+
+
 # ============================================================================
 # Main Entry Point
 # ============================================================================
@@ -337,37 +567,40 @@ COMMANDS = {
     "generate_outline": generate_outline,
     "embed_text": embed_text,
     "classify_text": classify_text,
+    "extract_entities_batch": extract_entities_batch,
+    "extract_keywords_batch": extract_keywords_batch,
+    "split_sentences_batch": split_sentences_batch,
 }
 
 
 def main():
     if len(sys.argv) < 2:
-        print(json.dumps({"error": "No command specified", "available": list(COMMANDS.keys())}))
+        write_json({"error": "No command specified", "available": list(COMMANDS.keys())})
         sys.exit(1)
     
     command = sys.argv[1]
     
     if command not in COMMANDS:
-        print(json.dumps({"error": f"Unknown command: {command}", "available": list(COMMANDS.keys())}))
+        write_json({"error": f"Unknown command: {command}", "available": list(COMMANDS.keys())})
         sys.exit(1)
     
     # Parse JSON args from stdin or argv
     if len(sys.argv) > 2:
         try:
-            args = json.loads(sys.argv[2])
+            args = loads(sys.argv[2])
         except json.JSONDecodeError:
             args = {"text": sys.argv[2]}
     else:
         try:
-            args = json.loads(sys.stdin.read())
+            args = loads(sys.stdin.read())
         except:
             args = {}
     
     try:
         result = COMMANDS[command](args)
-        print(json.dumps(result))
+        write_json(result)
     except Exception as e:
-        print(json.dumps({"error": str(e), "command": command}))
+        write_json({"error": str(e), "command": command})
         sys.exit(1)
 
 
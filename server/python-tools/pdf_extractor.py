@@ -1,33 +1,153 @@
 #!/usr/bin/env python3
 """
 PDF Text Extractor
-Uses pdfplumber to extract text from PDF files
+Uses pypdfium2 (PDFium) to extract text from PDF files, falling back to
+pdfplumber when it is not installed
+
+Usage:
+  python pdf_extractor.py <file.pdf> [--pages 1-3,7] [--engine pdfium|pdfplumber]
+                          [--workers N] [--strategy auto|fast]
+
+Page text is written to stdout as each page is extracted; the engine used
+is reported on stderr. The pdfplumber engine is pure Python, so documents of
+PARALLEL_MIN_PAGES or more are split into contiguous page shards and
+extracted in worker processes. --strategy fast (as in unstructured_parser.py)
+uses pdfplumber's simple text extraction, which skips word clustering.
 """
 
+import io
+import os
 import sys
 import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
 
 try:
     import pdfplumber
 except ImportError:
-    print(json.dumps({'error': 'pdfplumber not installed. Run: pip3 install pdfplumber'}))
-    sys.exit(1)
+    pdfplumber = None
+
+# Below this many pages, worker startup costs more than it saves
+PARALLEL_MIN_PAGES = 8
+
+
+def parse_pages(spec: str) -> List[int]:
+    """Parse a 1-based page spec like '1-3,7' into a page list."""
+    pages = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            pages.extend(range(int(start), int(end) + 1))
+        else:
+            pages.append(int(part))
+    return pages
+
+
+def extract_pdfium(pdf_path: str, out, pages: Optional[List[int]] = None):
+    """Write each page's text to out using PDFium's text layer (no layout analysis)."""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        indices = [p - 1 for p in pages] if pages else range(len(pdf))
+        for i in indices:
+            page = pdf[i]
+            textpage = page.get_textpage()
+            out.write(textpage.get_text_range().replace('\r\n', '\n'))
+            out.write('\n')
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+
+def extract_pdfplumber(pdf_path: str, out, pages: Optional[List[int]] = None,
+                       strategy: str = 'auto'):
+    """Write each page's text to out, dropping pdfplumber's per-page caches as we go."""
+    with pdfplumber.open(pdf_path, pages=pages) as pdf:
+        for page in pdf.pages:
+            if strategy == 'fast':
+                # Line-by-line char join; skips extract_text's word clustering
+                text = page.extract_text_simple()
+            else:
+                text = page.extract_text()
+            out.write(text or '')
+            out.write('\n')
+            page.flush_cache()
+
+
+def extract_shard(pdf_path: str, pages: List[int], strategy: str = 'auto') -> str:
+    """Worker: extract one contiguous page shard with pdfplumber."""
+    buf = io.StringIO()
+    extract_pdfplumber(pdf_path, buf, pages, strategy)
+    return buf.getvalue()
+
+
+def extract_pdfplumber_parallel(pdf_path: str, out, pages: Optional[List[int]] = None,
+                                workers: int = 1, strategy: str = 'auto'):
+    """Fan page shards out to a process pool and write them back in page order."""
+    if pages is None:
+        with pdfplumber.open(pdf_path) as pdf:
+            pages = list(range(1, len(pdf.pages) + 1))
+
+    workers = min(workers, len(pages))
+    if workers <= 1 or len(pages) < PARALLEL_MIN_PAGES:
+        extract_pdfplumber(pdf_path, out, pages, strategy)
+        return
+
+    size = -(-len(pages) // workers)
+    shards = [pages[i:i + size] for i in range(0, len(pages), size)]
+
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=ctx) as pool:
+        for text in pool.map(extract_shard, repeat(pdf_path), shards, repeat(strategy)):
+            out.write(text)
+
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description='Extract text from a PDF')
+    parser.add_argument('pdf_path', nargs='?')
+    parser.add_argument('--pages', help="1-based pages to extract, e.g. '1-3,7'")
+    parser.add_argument('--engine', choices=['pdfium', 'pdfplumber'],
+                        help='Extraction engine (default: pdfium if installed)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes for the pdfplumber engine')
+    parser.add_argument('--strategy', choices=['auto', 'fast'], default='auto',
+                        help='pdfplumber text strategy (fast: no word clustering)')
+    args = parser.parse_args()
+
+    if not args.pdf_path:
         print(json.dumps({'error': 'No PDF file provided'}))
         sys.exit(1)
-    
-    pdf_path = sys.argv[1]
-    
+
+    engine = args.engine or ('pdfium' if pdfium is not None else 'pdfplumber')
+    if engine == 'pdfium' and pdfium is None:
+        print(json.dumps({'error': 'pypdfium2 not installed. Run: pip3 install pypdfium2'}))
+        sys.exit(1)
+    if engine == 'pdfplumber' and pdfplumber is None:
+        print(json.dumps({'error': 'pdfplumber not installed. Run: pip3 install pdfplumber'}))
+        sys.exit(1)
+    print(f'[pdf_extractor] engine: {engine}', file=sys.stderr)
+
+    out = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', write_through=False)
+
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ''
-            for page in pdf.pages:
-                text += page.extract_text() + '\n'
-            
-            # Output extracted text
-            print(text)
+        pages = parse_pages(args.pages) if args.pages else None
+        if engine == 'pdfium':
+            extract_pdfium(args.pdf_path, out, pages)
+        else:
+            extract_pdfplumber_parallel(args.pdf_path, out, pages, args.workers, args.strategy)
+        out.flush()
     except Exception as e:
+        out.flush()
         print(json.dumps({'error': str(e)}))
         sys.exit(1)
@@ -2,13 +2,22 @@
 """
 BERTopic-based Topic Detection
 Detects conversation topics and assigns topic codes
+
+On CPU the MiniLM encoder runs as an int8 dynamically-quantized ONNX model
+(exported once to TOPIC_INT8_MODEL_DIR) when optimum[onnxruntime] is
+installed; otherwise sentence-transformers is used.
 """
 
+import os
+import re
 import sys
 import json
+from pathlib import Path
 from bertopic import BERTopic
+from bertopic.backend import BaseEmbedder
 from sentence_transformers import SentenceTransformer
 import numpy as np
+import torch
 
 # Topic code mapping (reverse lookup from detected topics)
 TOPIC_MAPPING = {
@@ -51,10 +60,86 @@ TOPIC_MAPPING = {
     'harm': 'THREAT',
 }
 
+# All keywords in one alternation, group i+1 = i-th mapping entry. The
+# lookahead reports a match at every position, so the lowest group number
+# seen is the first keyword (in mapping order) contained in the label.
+_TOPIC_PATTERN = re.compile(
+    '(?=' + '|'.join(f'({re.escape(k)})' for k in TOPIC_MAPPING) + ')'
+)
+_TOPIC_CODES = tuple(TOPIC_MAPPING.values())
+
+# Bytes that occur in no keyword; a label made only of these (empty, digits,
+# punctuation) cannot match, so it skips the regex scan
+_KEYWORD_ALPHABET = frozenset(''.join(TOPIC_MAPPING).encode('latin-1'))
+_NON_KEYWORD_BYTES = bytes(b for b in range(256) if b not in _KEYWORD_ALPHABET)
+
+MODEL_ID = 'sentence-transformers/all-MiniLM-L6-v2'
+INT8_MODEL_DIR = Path(os.environ.get(
+    'TOPIC_INT8_MODEL_DIR',
+    Path.home() / '.cache' / 'mcp-tool-platform' / 'minilm-int8'
+))
+
+class QuantizedMiniLM(BaseEmbedder):
+    """MiniLM on ONNX Runtime with int8 dynamic quantization, SentenceTransformer-style encode()"""
+    
+    def __init__(self, model_dir: Path = INT8_MODEL_DIR):
+        super().__init__()
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        
+        if not (model_dir / 'model_quantized.onnx').exists():
+            # One-time export + quantization, cached for later runs
+            model = ORTModelForFeatureExtraction.from_pretrained(MODEL_ID, export=True)
+            quantizer = ORTQuantizer.from_pretrained(model)
+            quantizer.quantize(
+                save_dir=model_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            )
+            AutoTokenizer.from_pretrained(MODEL_ID).save_pretrained(model_dir)
+        
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_dir, file_name='model_quantized.onnx')
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    
+    def encode(self, texts: list[str], batch_size: int = 64, normalize_embeddings: bool = True,
+               **kwargs) -> np.ndarray:
+        """Mean-pooled sentence embeddings, matching sentence-transformers output"""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=256,
+                return_tensors='np'
+            )
+            token_embeddings = self.model(**enc).last_hidden_state
+            mask = enc['attention_mask'][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled)
+        return np.vstack(batches) if batches else np.empty((0, 384), dtype=np.float32)
+    
+    def embed(self, documents: list[str], verbose: bool = False) -> np.ndarray:
+        """BERTopic backend hook"""
+        return self.encode(documents)
+
+def load_embedding_model():
+    """GPU: fp32 sentence-transformers. CPU: int8 ONNX if optimum is installed."""
+    if torch.cuda.is_available():
+        return SentenceTransformer('all-MiniLM-L6-v2', device='cuda')
+    try:
+        return QuantizedMiniLM()
+    except ImportError as e:
+        print(f"[topic_detector] int8 ONNX unavailable ({e}), using sentence-transformers",
+              file=sys.stderr)
+        return SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+
 class TopicDetector:
     def __init__(self):
-        # Use sentence-transformers for embeddings
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # MiniLM embeddings: fp32 on GPU, int8 ONNX on CPU when available
+        self.embedding_model = load_embedding_model()
         
         # Initialize BERTopic with minimal settings for speed
         self.topic_model = BERTopic(
@@ -82,17 +167,20 @@ class TopicDetector:
                 'embeddings': [[...], ...]  # Embeddings for similarity calc
             }
         """
+        # Embed once; BERTopic and the returned similarity vectors share the array
+        embeddings = self._encode(messages)
+        
         if len(messages) < 2:
             # Not enough messages for clustering
             return {
                 'topics': [-1] * len(messages),
                 'topic_labels': {},
                 'topic_codes': ['GENRL'] * len(messages),
-                'embeddings': self.embedding_model.encode(messages).tolist()
+                'embeddings': embeddings.tolist()
             }
         
         # Fit and transform
-        topics, probs = self.topic_model.fit_transform(messages)
+        topics, probs = self.topic_model.fit_transform(messages, embeddings=embeddings)
         self.is_fitted = True
         
         # Get topic labels
@@ -119,9 +207,6 @@ class TopicDetector:
                 code = self._map_to_code(label)
                 topic_codes.append(code)
         
-        # Get embeddings for similarity calculation
-        embeddings = self.embedding_model.encode(messages)
-        
         return {
             'topics': topics.tolist(),
             'topic_labels': topic_labels,
@@ -132,18 +217,31 @@ class TopicDetector:
     def _map_to_code(self, label: str) -> str:
         """Map BERTopic label to 6-char code"""
         label_lower = label.lower()
+        if not label_lower.encode('latin-1', 'ignore').translate(None, _NON_KEYWORD_BYTES):
+            return 'GENRL'
         
-        # Check for keyword matches
-        for keyword, code in TOPIC_MAPPING.items():
-            if keyword in label_lower:
-                return code
+        # Check for keyword matches in a single regex scan
+        first = min(
+            (m.lastindex for m in _TOPIC_PATTERN.finditer(label_lower)),
+            default=None
+        )
         
         # Default to GENRL
-        return 'GENRL'
+        return _TOPIC_CODES[first - 1] if first else 'GENRL'
+    
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """Batch-encode texts to normalized embeddings"""
+        return self.embedding_model.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=True
+        )
     
     def get_embedding(self, text: str) -> list[float]:
         """Get embedding for a single text"""
-        return self.embedding_model.encode([text])[0].tolist()
+        return self._encode([text])[0].tolist()
 
 def main():
     if len(sys.argv) < 2:
@@ -126,17 +126,23 @@ class UnstructuredParser:
             "format": path.suffix.lower()
         }
         
-        # Try to extract document-level metadata
+        # Try to extract document-level metadata (one getattr per field per element)
+        missing = object()
+        original_filename = missing
+        total_pages = None
         for element in elements:
-            if hasattr(element, 'metadata') and element.metadata:
-                elem_meta = element.metadata
-                if hasattr(elem_meta, 'filename'):
-                    metadata['original_filename'] = elem_meta.filename
-                if hasattr(elem_meta, 'page_number'):
-                    metadata['total_pages'] = max(
-                        metadata.get('total_pages', 0),
-                        elem_meta.page_number
-                    )
+            elem_meta = getattr(element, 'metadata', None)
+            if not elem_meta:
+                continue
+            original_filename = getattr(elem_meta, 'filename', original_filename)
+            page = getattr(elem_meta, 'page_number', None)
+            if page is not None and (total_pages is None or page > total_pages):
+                total_pages = page
+        
+        if original_filename is not missing:
+            metadata['original_filename'] = original_filename
+        if total_pages is not None:
+            metadata['total_pages'] = total_pages
         
         return metadata
     
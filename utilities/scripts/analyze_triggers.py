@@ -4,20 +4,62 @@ Analyze Skill Trigger Quality
 Scans Claude skill marketplaces for trigger anti-patterns.
 
 Usage:
-python analyze_triggers.py
+python analyze_triggers.py [marketplace_dir]
 """
 
+import os
 import sys
+import mmap
+from multiprocessing import Pool
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter
+from typing import Tuple
+
+try:
+    import re2 as re
+except ImportError:
+    import re
 
 INTROSPECTION_VERBS = ['notice', 'catch', 'sense', 'realize']
 EMOTIONAL_WORDS = ['overwhelmed', 'stuck', 'confused', 'frustrated']
 
-def analyze_triggers():
+# One alternation over every anti-pattern word: a single linear pass per file.
+# Bytes pattern so files can be scanned straight from an mmap.
+TRIGGER_RE = re.compile(
+    rb'\b(?:' + b'|'.join(re.escape(w.encode()) for w in INTROSPECTION_VERBS + EMOTIONAL_WORDS) + rb')\b',
+    re.IGNORECASE
+)
+
+def scan_file(path: str) -> Tuple[str, Counter]:
+    """Worker: count anti-pattern words in one file without copying it into Python memory"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return path, Counter()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            try:
+                hits = TRIGGER_RE.findall(mm)
+            except TypeError:
+                # Regex engine without buffer-protocol support: scan a bytes copy
+                hits = TRIGGER_RE.findall(mm[:])
+            return path, Counter(hit.lower().decode() for hit in hits)
+
+def analyze_triggers(root: str = '.'):
     print("Analyzing skill triggers...")
     print("Checking for anti-patterns...")
-    # Analysis logic would go here
+    totals = Counter()
+    flagged = {}
+    paths = (str(p) for p in Path(root).rglob('*.md'))
+    with Pool(os.cpu_count()) as pool:
+        for path, hits in pool.imap_unordered(scan_file, paths, chunksize=32):
+            if hits:
+                flagged[path] = hits
+                totals.update(hits)
+
+    for path, hits in sorted(flagged.items()):
+        print(f"  {path}: {', '.join(f'{w} x{n}' for w, n in hits.most_common())}")
+    print(f"{len(flagged)} files with anti-pattern triggers")
+    for word, count in totals.most_common():
+        print(f"  {word}: {count}")
 
 if __name__ == '__main__':
-    analyze_triggers()
+    analyze_triggers(sys.argv[1] if len(sys.argv) > 1 else '.')
@@ -4,33 +4,225 @@ Batch JSON Splitter
 Process multiple JSON files at once.
 
 Usage:
-python batch_json_splitter.py <directory> [--chunk-size MB]
+python batch_json_splitter.py <directory> [--chunk-size MB] [--force]
+
+Each file's top-level array (or its "conversations" array) is streamed
+item by item and written to chunk_<name>_NNNN.json files next to it. A
+new chunk is started whenever the current one reaches --chunk-size MB.
+Files whose mtime, size and chunk size match the .bjs_cache.json manifest
+from an earlier run are skipped.
 """
 
 import argparse
-import subprocess
+import json
+import os
 import sys
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+try:
+    import ijson.backends.yajl2_c as ijson
+except ImportError:
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    orjson = None
+    loads = json.loads
+
+# Per-directory record of split files, so unchanged files are skipped on reruns
+MANIFEST_NAME = '.bjs_cache.json'
+
+def _peek_top_level(f) -> bytes:
+    """Return the first non-whitespace byte and rewind"""
+    head = f.read(4096).lstrip(b'\xef\xbb\xbf \t\r\n')
+    f.seek(0)
+    return head[:1]
+
+def _iter_items(f, is_list: bool):
+    if ijson is not None:
+        # Stream one item at a time; the source file is never fully in memory
+        return ijson.items(f, 'item' if is_list else 'conversations.item', use_float=True)
+    data = loads(f.read())
+    if is_list:
+        return data
+    if isinstance(data, dict) and 'conversations' in data:
+        return data['conversations']
+    raise ValueError("Unable to find conversations array")
+
+def _has_conversations(f) -> bool:
+    """Whether the top-level object has a "conversations" array"""
+    f.seek(0)
+    return any(isinstance(value, list) for value in ijson.items(f, 'conversations', use_float=True))
+
+def _dumps(item) -> bytes:
+    """Compact UTF-8 JSON; orjson emits bytes directly, no str round trip"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(item)
+        except TypeError:
+            # e.g. integers beyond 64 bits
+            pass
+    return json.dumps(item, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def split_file(path: str, chunk_size: float) -> List[str]:
+    """Split one JSON file into chunks of about chunk_size MB; returns the chunk paths"""
+    limit = int(chunk_size * 1024 * 1024)
+    directory, name = os.path.split(path)
+    stem = name[:-len('.json')]
+    chunks = []
+    out = None
+    written = 0
+    
+    with open(path, 'rb') as f:
+        is_list = _peek_top_level(f) == b'['
+        head, tail = (b'[', b']') if is_list else (b'{"conversations":[', b']}')
+        try:
+            for item in _iter_items(f, is_list):
+                data = _dumps(item)
+                if out is not None and written + len(data) > limit:
+                    out.write(tail)
+                    out.close()
+                    out = None
+                if out is None:
+                    chunk_path = os.path.join(directory, f"chunk_{stem}_{len(chunks) + 1:04d}.json")
+                    out = open(chunk_path, 'wb')
+                    out.write(head)
+                    chunks.append(chunk_path)
+                    written = len(head) + len(tail)
+                else:
+                    out.write(b',')
+                    written += 1
+                out.write(data)
+                written += len(data)
+            # ijson streams a missing "conversations" key as zero items; an
+            # empty array is fine, a missing one fails as in the non-ijson path
+            if not chunks and ijson is not None and not is_list and not _has_conversations(f):
+                raise ValueError("Unable to find conversations array")
+        except BaseException:
+            # A parse error partway through would leave valid-looking but
+            # truncated chunks behind; remove every chunk this call wrote
+            if out is not None:
+                out.close()
+                out = None
+            for chunk_path in chunks:
+                try:
+                    os.unlink(chunk_path)
+                except FileNotFoundError:
+                    pass
+            raise
+        finally:
+            if out is not None:
+                out.write(tail)
+                out.close()
+    return chunks
 
 class BatchJSONSplitter:
-    def __init__(self, directory: str, chunk_size: float = 50):
-        self.directory = Path(directory)
+    def __init__(self, directory: str, chunk_size: float = 50, force: bool = False):
+        self.directory = os.fspath(directory)
         self.chunk_size = chunk_size
+        self.force = force
+        self.manifest_path = os.path.join(self.directory, MANIFEST_NAME)
     
     def process_all(self):
-        files = [f for f in self.directory.glob('*.json') if not f.stem.startswith('chunk_')]
-        print(f"Found {len(files)} JSON files to process")
+        manifest = self._load_manifest()
+        files = []
+        stats = {}
+        skipped = 0
+        # Plain path strings from scandir; no per-file Path objects
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                name = entry.name
+                if not name.endswith('.json') or name.startswith(('chunk_', '.')) or not entry.is_file():
+                    continue
+                st = entry.stat()
+                stats[entry.path] = [st.st_mtime_ns, st.st_size, self.chunk_size]
+                cached = manifest.get(name)
+                if not self.force and cached is not None and cached[:3] == stats[entry.path]:
+                    skipped += 1
+                    continue
+                files.append(entry.path)
+        print(f"Found {len(files)} JSON files to process ({skipped} unchanged, skipped)")
         
-        for i, file in enumerate(files, 1):
-            print(f"\nProcessing {i}/{len(files)}: {file.name}")
-            # Process file...
-            print(f"Completed {file.name}")
+        if len(files) <= 1:
+            for file in files:
+                chunks = self._report(1, 1, file, lambda: split_file(file, self.chunk_size))
+                self._record(manifest, file, stats[file], chunks)
+        else:
+            # Files share no state: one interpreter per worker for the whole batch,
+            # reporting each file as it finishes rather than in submission order
+            workers = min(os.cpu_count() or 1, len(files))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(split_file, file, self.chunk_size): file for file in files}
+                for i, future in enumerate(as_completed(futures), 1):
+                    file = futures[future]
+                    chunks = self._report(i, len(files), file, future.result)
+                    self._record(manifest, file, stats[file], chunks)
+        
+        if files:
+            self._save_manifest(manifest)
+    
+    @staticmethod
+    def _report(i: int, total: int, file: str, result) -> Optional[List[str]]:
+        """Print one file's outcome; a bad file is reported without stopping the batch"""
+        name = os.path.basename(file)
+        try:
+            chunks = result()
+        except Exception as e:
+            print(f"Failed {i}/{total}: {name}: {e}", file=sys.stderr)
+            return None
+        print(f"Completed {i}/{total}: {name} -> {len(chunks)} chunks")
+        return chunks
+    
+    def _record(self, manifest: dict, file: str, key: list, chunks: Optional[List[str]]):
+        name = os.path.basename(file)
+        if chunks is None:
+            # Failed files are retried on the next run; chunks from an earlier
+            # split of the file are stale now and are dropped with the entry
+            previous = manifest.pop(name, None)
+            if previous is not None:
+                self._unlink_chunks(previous[3])
+            return
+        names = [os.path.basename(c) for c in chunks]
+        previous = manifest.get(name)
+        if previous is not None:
+            # A re-split can produce fewer chunks; drop the leftovers
+            self._unlink_chunks(set(previous[3]) - set(names))
+        manifest[name] = key + [names]
+    
+    def _unlink_chunks(self, names):
+        for stale in names:
+            try:
+                os.unlink(os.path.join(self.directory, stale))
+            except FileNotFoundError:
+                pass
+    
+    def _load_manifest(self) -> dict:
+        """name -> [mtime_ns, size, chunk_size, chunk names] from the last run"""
+        try:
+            with open(self.manifest_path, 'rb') as f:
+                manifest = loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+    
+    def _save_manifest(self, manifest: dict):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(manifest))
+        os.replace(tmp_path, self.manifest_path)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Batch process JSON files')
     parser.add_argument('directory', help='Directory with JSON files')
     parser.add_argument('--chunk-size', type=float, default=50)
+    parser.add_argument('--force', action='store_true', help='Re-split files even if unchanged since the last run')
     args = parser.parse_args()
     
-    processor = BatchJSONSplitter(args.directory, args.chunk_size)
+    processor = BatchJSONSplitter(args.directory, args.chunk_size, args.force)
     processor.process_all()
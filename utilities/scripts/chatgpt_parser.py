@@ -6,17 +6,130 @@ Parses ChatGPT export files and extracts conversations, entities, and artifacts.
 """
 
 from pathlib import Path
+import os
 import json
+import mmap
 import hashlib
 import spacy
 import re
 import sys
-from typing import Iterator, Dict, List, Optional, Any
-from datetime import datetime
+from typing import Iterable, Iterator, Dict, List, Optional, Any
+from datetime import datetime, timezone
 from dataclasses import dataclass, asdict
 import uuid
 
-@dataclass
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import ijson.backends.yajl2_c as ijson
+except ImportError:
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+# Only tok2vec + ner are needed for entity extraction
+SPACY_DISABLED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+SPACY_BATCH_SIZE = 256
+# Larger batches keep a GPU busy
+SPACY_GPU_BATCH_SIZE = 1024
+
+def enable_spacy_gpu() -> bool:
+    """Run spaCy on the GPU when cupy is available (call before spacy.load); CPU-only machines fall through silently."""
+    try:
+        import cupy  # noqa: F401
+        from thinc.api import set_gpu_allocator
+        set_gpu_allocator("pytorch")
+        return spacy.prefer_gpu()
+    except Exception:
+        return False
+
+# Schema pre-scan reads only the head of the export
+SCHEMA_SCAN_BYTES = 64 * 1024
+# Exports up to this size are decoded in one orjson call; larger ones stream via ijson
+MAX_IN_MEMORY_BYTES = 512 * 1024 * 1024
+# Turns buffered per Parquet record batch
+PARQUET_BATCH_ROWS = 64 * 1024
+
+# Digest algorithms are recorded in the run log; hashes from runs with
+# different algorithms are not comparable.
+MESSAGE_HASH_ALGORITHM = "blake3" if blake3 else "sha256"
+ARTIFACT_HASH_ALGORITHM = "xxh3_128" if xxhash else "blake2b-128"
+
+def _first_object_keys(head: bytes) -> List[str]:
+    """Collect the top-level keys of the first JSON object in a (possibly truncated) buffer."""
+    keys = []
+    depth = 0
+    in_string = False
+    escaped = False
+    start = 0
+    last_string = None
+    for i, byte in enumerate(head):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif byte == 0x5C:  # backslash
+                escaped = True
+            elif byte == 0x22:  # closing quote
+                in_string = False
+                if depth == 1:
+                    last_string = head[start:i]
+            continue
+        if byte == 0x22:
+            in_string = True
+            start = i + 1
+        elif byte == 0x3A and depth == 1 and last_string is not None:  # colon after a key
+            keys.append(last_string.decode("utf-8", "replace"))
+            last_string = None
+        elif byte in (0x7B, 0x5B):  # { [
+            if byte == 0x5B and depth == 0:
+                continue  # top-level array: look inside its first element
+            depth += 1
+        elif byte in (0x7D, 0x5D):  # } ]
+            depth -= 1
+            if depth == 0:
+                break
+        elif byte == 0x2C and depth == 1:
+            last_string = None
+    return keys
+
+def message_hash(content: str) -> str:
+    """Stable 256-bit digest of a message body (BLAKE3, SHA-256 fallback)."""
+    data = content.encode("utf-8")
+    if blake3 is not None:
+        return blake3.blake3(data).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+def artifact_hash(content: str) -> str:
+    """Fast 128-bit fingerprint for artifact dedup (not cryptographic)."""
+    data = content.encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Records use __slots__ (no per-instance __dict__) and intern their
+# low-cardinality string fields so millions of rows share one str each.
+
+@dataclass(slots=True, frozen=True)
 class ConversationTurn:
     """Normalized conversation turn schema"""
     message_hash: str
@@ -26,8 +139,12 @@ class ConversationTurn:
     turn_type: str
     content: str
     raw_metadata: Dict[str, Any]
+    
+    def __post_init__(self):
+        object.__setattr__(self, "platform", sys.intern(self.platform))
+        object.__setattr__(self, "turn_type", sys.intern(self.turn_type))
 
-@dataclass
+@dataclass(slots=True)
 class Entity:
     """Extracted entity schema"""
     entity_id: str
@@ -38,8 +155,12 @@ class Entity:
     first_mention: Dict[str, str]
     mention_count: int
     extraction_method: str
+    
+    def __post_init__(self):
+        self.type = sys.intern(self.type)
+        self.extraction_method = sys.intern(self.extraction_method)
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Artifact:
     """Code block or file artifact schema"""
     artifact_id: str
@@ -51,14 +172,85 @@ class Artifact:
     source_message: str
     timestamp: str
     metadata: Dict[str, Any]
+    
+    def __post_init__(self):
+        object.__setattr__(self, "type", sys.intern(self.type))
+        object.__setattr__(self, "language", sys.intern(self.language))
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode("utf-8") if orjson else json.dumps(obj, ensure_ascii=False)
+
+class TurnJsonlWriter:
+    """One JSON object per turn (row-oriented)."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+    
+    def write(self, turn: ConversationTurn):
+        self.file.write(_dumps(asdict(turn)))
+        self.file.write("\n")
+    
+    def close(self):
+        self.file.close()
+
+class TurnParquetWriter:
+    """Columnar turn output: one list per field, flushed as zstd Parquet record batches."""
+    
+    FIELDS = ("message_hash", "conversation_id", "platform", "timestamp", "turn_type", "content", "raw_metadata")
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.schema = pa.schema([
+            ("message_hash", pa.string()),
+            ("conversation_id", pa.string()),
+            ("platform", pa.dictionary(pa.int32(), pa.string())),
+            ("timestamp", pa.string()),
+            ("turn_type", pa.dictionary(pa.int32(), pa.string())),
+            ("content", pa.string()),
+            ("raw_metadata", pa.string()),  # JSON text
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self.columns = {name: [] for name in self.FIELDS}
+    
+    def write(self, turn: ConversationTurn):
+        columns = self.columns
+        columns["message_hash"].append(turn.message_hash)
+        columns["conversation_id"].append(turn.conversation_id)
+        columns["platform"].append(turn.platform)
+        columns["timestamp"].append(turn.timestamp)
+        columns["turn_type"].append(turn.turn_type)
+        columns["content"].append(turn.content)
+        columns["raw_metadata"].append(_dumps(turn.raw_metadata))
+        if len(columns["message_hash"]) >= PARQUET_BATCH_ROWS:
+            self.flush()
+    
+    def flush(self):
+        if not self.columns["message_hash"]:
+            return
+        arrays = [
+            pa.array(self.columns[field.name], type=field.type) if not pa.types.is_dictionary(field.type)
+            else pa.array(self.columns[field.name], type=pa.string()).dictionary_encode().cast(field.type)
+            for field in self.schema
+        ]
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.columns = {name: [] for name in self.FIELDS}
+    
+    def close(self):
+        self.flush()
+        self.writer.close()
 
 class ChatGPTParser:
     """Parses ChatGPT JSON exports and extracts structured data."""
     
-    def __init__(self, export_path: Path, output_dir: Path = None):
+    def __init__(self, export_path: Path, output_dir: Path = None, output_format: str = None, on_gpu: bool = False):
         self.export_path = Path(export_path)
         self.output_dir = Path(output_dir) if output_dir else self.export_path.parent
+        # JSONL by default for existing consumers; Parquet is opt-in
+        self.output_format = output_format or "jsonl"
         self.output_dir.mkdir(exist_ok=True)
+        # True when enable_spacy_gpu() succeeded before this model load
+        self.on_gpu = on_gpu
         self.schema_map = {}
         self.entity_tracker = {}
         self.stats = {
@@ -70,8 +262,9 @@ class ChatGPTParser:
         }
         
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-            self._log("Loaded spaCy model: en_core_web_sm")
+            self.nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLED_PIPES)
+            self._log(f"Loaded spaCy model: en_core_web_sm (pipes: {', '.join(self.nlp.pipe_names)}, "
+                      f"{'GPU' if self.on_gpu else 'CPU'})")
         except OSError:
             self._log_error("spaCy model 'en_core_web_sm' not found. Install with: python -m spacy download en_core_web_sm")
             sys.exit(1)
@@ -83,19 +276,113 @@ class ChatGPTParser:
         print(f"[ERROR] {message}", file=sys.stderr)
         self.stats["errors"] += 1
     
+    def nlp_docs(self, texts: Iterable[str], n_process: int = None) -> Iterator:
+        """Run NER over many message texts in batches (multi-process on CPU, one large-batch process on GPU)."""
+        if self.on_gpu:
+            return self.nlp.pipe(texts, batch_size=SPACY_GPU_BATCH_SIZE)
+        return self.nlp.pipe(
+            texts,
+            batch_size=SPACY_BATCH_SIZE,
+            n_process=n_process or os.cpu_count() or 1
+        )
+    
+    def pre_scan_schema(self) -> bool:
+        """Detect the export layout from the first SCHEMA_SCAN_BYTES without decoding the file."""
+        try:
+            with open(self.export_path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                head = mm[:SCHEMA_SCAN_BYTES]
+        except (OSError, ValueError) as e:  # ValueError: empty file
+            self._log_error(f"Cannot read export: {e}")
+            return False
+        
+        head = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+        keys = _first_object_keys(head)
+        if head[:1] == b"[":
+            self.schema_map = {"root": "list", "item_prefix": "item", "conversation_keys": keys}
+        elif head[:1] == b"{" and "conversations" in keys:
+            self.schema_map = {"root": "object", "item_prefix": "conversations.item", "conversation_keys": []}
+        else:
+            self._log_error("Export is neither a conversation array nor a {conversations: [...]} object")
+            return False
+        
+        self._log(f"Detected schema: {self.schema_map['root']} root, keys: {', '.join(keys) or '?'}")
+        return True
+    
+    def iter_conversations(self) -> Iterator[Dict[str, Any]]:
+        """Yield conversations, decoding in one pass when the export fits in memory."""
+        if orjson is not None and self.export_path.stat().st_size <= MAX_IN_MEMORY_BYTES:
+            with open(self.export_path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                    memoryview(mm) as view:
+                data = orjson.loads(view)
+            yield from (data if self.schema_map["root"] == "list" else data["conversations"])
+        elif ijson is not None:
+            with open(self.export_path, "rb") as f:
+                yield from ijson.items(f, self.schema_map["item_prefix"], use_float=True)
+        else:
+            with open(self.export_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            yield from (data if self.schema_map["root"] == "list" else data["conversations"])
+    
+    def iter_turns(self, conversation: Dict[str, Any]) -> Iterator[ConversationTurn]:
+        """Flatten a conversation's message mapping into turns."""
+        conversation_id = conversation.get("conversation_id") or conversation.get("id") or ""
+        for node in (conversation.get("mapping") or {}).values():
+            message = (node or {}).get("message")
+            if not message:
+                continue
+            parts = (message.get("content") or {}).get("parts") or []
+            content = "\n".join(p for p in parts if isinstance(p, str))
+            if not content:
+                continue
+            created = message.get("create_time")
+            yield ConversationTurn(
+                message_hash=message_hash(content),
+                conversation_id=conversation_id,
+                platform="chatgpt",
+                timestamp=datetime.fromtimestamp(created, tz=timezone.utc).isoformat() if created else "",
+                turn_type=(message.get("author") or {}).get("role") or "unknown",
+                content=content,
+                raw_metadata=message.get("metadata") or {}
+            )
+    
+    def open_turn_writer(self):
+        if self.output_format == "parquet":
+            if pa is None:
+                raise RuntimeError("pyarrow is required for Parquet output (pip install pyarrow)")
+            return TurnParquetWriter(self.output_dir / "conversation_turns.parquet")
+        return TurnJsonlWriter(self.output_dir / "conversation_turns.jsonl")
+    
     def run(self):
         """Main pipeline execution."""
         self._log(f"Starting ChatGPT parser for: {self.export_path}")
+        self._log(f"Hashing: messages={MESSAGE_HASH_ALGORITHM}, artifacts={ARTIFACT_HASH_ALGORITHM}")
         if not self.pre_scan_schema():
             self._log_error("Schema detection failed. Cannot proceed.")
             return
         # Process conversations...
+        writer = self.open_turn_writer()
+        try:
+            for conversation in self.iter_conversations():
+                for turn in self.iter_turns(conversation):
+                    writer.write(turn)
+                    self.stats["messages_processed"] += 1
+                self.stats["conversations_processed"] += 1
+        finally:
+            writer.close()
+        self._log(f"Wrote {self.stats['messages_processed']} turns to {writer.path}")
         self._log("Processing complete")
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) < 2:
-        print("Usage: python chatgpt_parser.py <export.json> [output_dir]")
-        sys.exit(1)
-    parser = ChatGPTParser(export_path=sys.argv[1], output_dir=sys.argv[2] if len(sys.argv) > 2 else None)
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Parse a ChatGPT export")
+    arg_parser.add_argument("export", help="ChatGPT export JSON")
+    arg_parser.add_argument("output_dir", nargs="?", default=None)
+    arg_parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl",
+                            help="Turn output format; parquet needs pyarrow (default: jsonl)")
+    args = arg_parser.parse_args()
+    # GPU placement must be chosen before spacy.load in the parser
+    on_gpu = enable_spacy_gpu()
+    parser = ChatGPTParser(export_path=args.export, output_dir=args.output_dir, output_format=args.format, on_gpu=on_gpu)
     parser.run()
@@ -7,14 +7,47 @@ Usage:
 python chunk_file_tool.py <file> [--chunk-size MB]
 """
 
+import os
 import sys
 from pathlib import Path
 
+COPY_BUFFER_SIZE = 1 << 20
+
+def _copy_range(src, dst, offset: int, count: int):
+    """Copy count bytes from src at offset into dst, in-kernel where sendfile allows."""
+    if hasattr(os, 'sendfile'):
+        try:
+            while count:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+            return
+        except OSError:
+            # Some platforms (e.g. macOS) only sendfile to sockets
+            pass
+    src.seek(offset)
+    while count:
+        buf = src.read(min(COPY_BUFFER_SIZE, count))
+        if not buf:
+            break
+        dst.write(buf)
+        count -= len(buf)
+
 def chunk_file(filepath: str, chunk_size_mb: int = 10):
     print(f"Chunking {filepath} into {chunk_size_mb}MB pieces...")
     file_path = Path(filepath)
     chunk_size = chunk_size_mb * 1024 * 1024
-    # Chunking logic would go here
+    output_dir = file_path.parent / f"{file_path.stem}_chunks"
+    output_dir.mkdir(exist_ok=True)
+    
+    with open(file_path, 'rb') as src:
+        size = os.fstat(src.fileno()).st_size
+        for i, offset in enumerate(range(0, size, chunk_size), start=1):
+            with open(output_dir / f"chunk_{i:04d}{file_path.suffix}", 'wb') as dst:
+                _copy_range(src, dst, offset, min(chunk_size, size - offset))
+            print(f"Created chunk {i}")
     print("File chunked successfully")
 
 if __name__ == '__main__':
@@ -5,16 +5,207 @@ Cleanup and convert markdown files.
 
 Usage:
 python clean_markdown_converter.py <file.md>
+
+The cleanup rules form two passes, character replacements then whitespace.
+Each pass is compiled once into a Hyperscan database when hyperscan is
+installed, so all of its rules are matched in one scan; otherwise into one
+alternation for Python's re. Cleaning a cleaned file changes nothing.
+
+The rules apply to prose only: fenced code blocks (``` or ~~~) are copied
+through unchanged, and two or more trailing spaces (a Markdown hard line
+break) are kept.
+
+The file is streamed in READ_CHUNK blocks and rewritten atomically, so memory
+stays flat however large the input is.
 """
 
+import os
+import re
+import shutil
 import sys
-from pathlib import Path
+import tempfile
+from typing import List, Tuple
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# (pattern, replacement) over UTF-8 bytes, applied as two single-scan passes.
+# Character rules run first, so whitespace they produce (NBSP -> space) or
+# expose (removed zero-width characters) is seen by the whitespace pass, and
+# cleaning the output again changes nothing. Within a pass, where two rules
+# match at the same offset the longer match wins, then the earlier rule. A
+# replacement of None keeps the matched text, minus any CR.
+# Non-ASCII characters are written as literal alternations, not classes, so
+# the patterns mean the same to a bytes regex as to Hyperscan in UTF-8 mode.
+CHARACTER_RULES = [
+    # Zero-width characters and byte order marks
+    ('\u200b|\u200c|\u200d|\ufeff', ''),
+    ('\u00a0', ' '),
+    ('\u2018|\u2019', "'"),
+    ('\u201c|\u201d', '"'),
+]
+
+WHITESPACE_RULES = [
+    # Runs of blank (or whitespace-only) lines collapse to one blank line
+    (r'[ \t\r]*\n(?:[ \t\r]*\n){2,}', '\n\n'),
+    # Hard line break (two or more trailing spaces): kept, so it beats the
+    # trailing-whitespace rule below on equal-length matches
+    (r'[ \t\r]*  \r*$', None),
+    # Other trailing whitespace. CR counts as whitespace here, so CRLF
+    # endings become LF; a lone CR mid-line is left alone, since turning it
+    # into a line break could start a code fence the next run would skip
+    (r'[ \t\r]+$', ''),
+]
+
+CLEANUP_PASSES = [CHARACTER_RULES, WHITESPACE_RULES]
+
+READ_CHUNK = 1 << 20
+# No rule can match across an ASCII byte that is not one of these, so a
+# block is safe to clean up to its last such byte; the rest carries over
+_CARRY_BYTES = bytes(range(0x80, 0x100)) + b' \t\r\n'
+# Opening or closing code fence: up to three spaces, then ``` or ~~~
+FENCE_RE = re.compile(rb' {0,3}(`{3,}|~{3,})')
+
+def _compile_hyperscan(rules):
+    db = hyperscan.Database()
+    flags = hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_UTF8
+    db.compile(
+        expressions=[pattern.encode('utf-8') for pattern, _ in rules],
+        ids=list(range(len(rules))),
+        elements=len(rules),
+        flags=[flags] * len(rules),
+    )
+    return db
+
+def _compile_re(rules):
+    return re.compile(
+        b'|'.join(b'(%s)' % pattern.encode('utf-8') for pattern, _ in rules),
+        re.MULTILINE
+    )
+
+HS_DATABASES = [_compile_hyperscan(rules) for rules in CLEANUP_PASSES] if hyperscan is not None else None
+CLEANUP_RES = [_compile_re(rules) for rules in CLEANUP_PASSES]
+REPLACEMENTS = [
+    [None if repl is None else repl.encode('utf-8') for _, repl in rules]
+    for rules in CLEANUP_PASSES
+]
+
+def _replace(replacements: List[bytes], rule: int, matched: bytes) -> bytes:
+    repl = replacements[rule]
+    return matched.replace(b'\r', b'') if repl is None else repl
+
+def _select(matches: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Leftmost-longest non-overlapping matches from Hyperscan's raw (start, end, id) reports"""
+    matches.sort(key=lambda m: (m[0], -m[1], m[2]))
+    selected = []
+    pos = 0
+    for start, end, rule in matches:
+        if start >= pos and end > start:
+            selected.append((start, end, rule))
+            pos = end
+    return selected
+
+def _apply_pass(i: int, data: bytes) -> bytes:
+    replacements = REPLACEMENTS[i]
+    if HS_DATABASES is None:
+        return CLEANUP_RES[i].sub(lambda m: _replace(replacements, m.lastindex - 1, m.group()), data)
+
+    matches = []
+
+    def on_match(rule: int, start: int, end: int, flags: int, context):
+        matches.append((start, end, rule))
+
+    HS_DATABASES[i].scan(data, match_event_handler=on_match)
+    parts = []
+    pos = 0
+    for start, end, rule in _select(matches):
+        parts.append(data[pos:start])
+        parts.append(_replace(replacements, rule, data[start:end]))
+        pos = end
+    parts.append(data[pos:])
+    return b''.join(parts)
+
+def clean_chars(data: bytes) -> bytes:
+    """Apply the character rules only"""
+    return _apply_pass(0, data)
+
+def clean_bytes(data: bytes) -> bytes:
+    """Apply every cleanup rule to data: one scan per pass"""
+    for i in range(len(CLEANUP_PASSES)):
+        data = _apply_pass(i, data)
+    return data
+
+def _closes(fence: bytes, line: bytes) -> bool:
+    m = FENCE_RE.match(line)
+    return (m is not None and m.group(1)[:1] == fence[:1]
+            and len(m.group(1)) >= len(fence) and not line[m.end():].strip())
+
+def clean_stream(src, dst) -> bool:
+    """Clean src into dst block by block, copying fenced code verbatim; True if anything was replaced"""
+    changed = False
+    prose = b''
+    # Whether prose begins a line, i.e. starts the file or follows a fence
+    prose_whole_lines = True
+    fence = None
+    line_start = True
+    
+    def flush(piece: bytes, whole_lines: bool):
+        nonlocal changed
+        if whole_lines:
+            # Stand-in for the previous line's terminator, so a leading run of
+            # blank lines collapses the same as one in mid-text
+            cleaned = clean_bytes(b'\n' + piece)[1:]
+        else:
+            cleaned = clean_bytes(piece)
+        changed |= cleaned != piece
+        dst.write(cleaned)
+    
+    # readline caps each read at READ_CHUNK, so one huge line never loads whole
+    for line in iter(lambda: src.readline(READ_CHUNK), b''):
+        at_start, line_start = line_start, line.endswith(b'\n')
+        if fence is not None:
+            dst.write(line)
+            if at_start and _closes(fence, line):
+                fence = None
+            continue
+        # Match on the line as it will be written, so a fence hidden behind a
+        # zero-width character or NBSP is found now rather than on a rerun
+        m = FENCE_RE.match(clean_chars(line)) if at_start else None
+        if m is not None:
+            flush(prose, prose_whole_lines)
+            prose = b''
+            prose_whole_lines = True
+            fence = m.group(1)
+            dst.write(line)
+            continue
+        prose += line
+        if len(prose) >= READ_CHUNK:
+            cut = len(prose.rstrip(_CARRY_BYTES))
+            if not cut:
+                continue
+            flush(prose[:cut], prose_whole_lines)
+            prose = prose[cut:]
+            prose_whole_lines = False
+    flush(prose, prose_whole_lines)
+    return changed
 
 def clean_markdown(filepath: str):
     print(f"Cleaning markdown: {filepath}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    # Cleanup logic would go here
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)), prefix='.clean_')
+    try:
+        with open(filepath, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            changed = clean_stream(src, dst)
+        if changed:
+            shutil.copymode(filepath, tmp_path)
+            os.replace(tmp_path, filepath)
+        else:
+            os.unlink(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
     print("Markdown cleaned")
 
 if __name__ == '__main__':
@@ -5,13 +5,113 @@ Benchmarks sentiment analysis accuracy.
 
 Usage:
 python compare_nltk_vs_agent.py <session.jsonl>
+
+Each line holds a turn with "content" and the agent's label in
+"agent_sentiment" (or "sentiment"). Every turn is scored with NLTK VADER's
+polarity_scores; large sessions are split into batches scored across
+processes, each loading the analyzer once.
 """
 
+import json
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+# VADER's compound label thresholds
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+READ_CHUNK = 1 << 20
+# Sessions with fewer turns are scored in-process
+PARALLEL_MIN_TURNS = 2000
+BATCH_SIZE = 500
+
+_analyzer = None
+
+def init_analyzer():
+    """Load NLTK's VADER analyzer once per process"""
+    global _analyzer
+    if _analyzer is None:
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+
+def score_batch(texts: List[str]) -> List[float]:
+    init_analyzer()
+    polarity_scores = _analyzer.polarity_scores
+    return [polarity_scores(text)['compound'] for text in texts]
+
+def score_lines(texts: List[str]) -> np.ndarray:
+    """NLTK VADER compound score per text; large sessions are scored in batches across processes"""
+    if len(texts) < PARALLEL_MIN_TURNS:
+        return np.asarray(score_batch(texts), dtype=np.float64)
+    batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+    with ProcessPoolExecutor(initializer=init_analyzer) as pool:
+        return np.fromiter(chain.from_iterable(pool.map(score_batch, batches)), dtype=np.float64, count=len(texts))
+
+def label(compound: np.ndarray) -> np.ndarray:
+    labels = np.full(compound.shape, 'neutral', dtype=object)
+    labels[compound >= POSITIVE_THRESHOLD] = 'positive'
+    labels[compound <= NEGATIVE_THRESHOLD] = 'negative'
+    return labels
+
+def iter_jsonl(filepath: str):
+    """Parse JSONL records from 1 MiB binary reads; lines are never decoded to str first"""
+    carry = b''
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(READ_CHUNK), b''):
+            lines = (carry + block).split(b'\n')
+            carry = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield loads(line)
+    if carry.strip():
+        yield loads(carry)
+
+def read_session(filepath: str) -> Tuple[List[str], List[str]]:
+    texts = []
+    agent_labels = []
+    for record in iter_jsonl(filepath):
+        if not isinstance(record, dict):
+            continue
+        agent = record.get('agent_sentiment') or record.get('sentiment')
+        if not isinstance(record.get('content'), str) or not agent:
+            continue
+        texts.append(record['content'])
+        agent_labels.append(str(agent).lower())
+    return texts, agent_labels
 
 def compare_sentiment(filepath: str):
     print(f"Comparing NLTK vs LLM sentiment on: {filepath}")
-    # Comparison logic would go here
+    try:
+        init_analyzer()
+    except ImportError:
+        print("nltk not installed. Run: pip install nltk")
+        sys.exit(1)
+    except LookupError:
+        print("VADER lexicon missing. Run: python -m nltk.downloader vader_lexicon")
+        sys.exit(1)
+    
+    texts, agent_labels = read_session(filepath)
+    if not texts:
+        print("No turns with both content and an agent sentiment label")
+        return
+    
+    nltk_labels = label(score_lines(texts))
+    agreement = np.mean(nltk_labels == np.asarray(agent_labels, dtype=object))
+    confusion = Counter(zip(agent_labels, nltk_labels))
+    
+    print(f"Compared {len(texts)} turns: {agreement:.1%} agreement")
+    for (agent, nltk_label), count in sorted(confusion.items()):
+        print(f"  agent={agent:<12} nltk={nltk_label:<8} {count}")
     print("Comparison complete")
 
 if __name__ == '__main__':
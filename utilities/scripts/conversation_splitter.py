@@ -4,57 +4,127 @@ Conversation JSON Splitter
 Splits conversation export files by number of conversations.
 
 Usage:
-python conversation_splitter.py <file.json> [--conversations-per-chunk N]
+python conversation_splitter.py <file.json> [--conversations-per-chunk N] [--pretty]
 """
 
 import json
 import sys
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import ijson.backends.yajl2_c as ijson
+except ImportError:
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Chunk writes overlap with parsing; at most WRITE_WORKERS * 2 chunks are buffered
+WRITE_WORKERS = 4
+
 if sys.platform == 'win32':
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'ignore')
 
 class ConversationSplitter:
-    def __init__(self, input_file: str, convs_per_chunk: int = 50, output_dir: str = None):
+    def __init__(self, input_file: str, convs_per_chunk: int = 50, output_dir: str = None, pretty: bool = False):
         self.input_file = Path(input_file)
         self.convs_per_chunk = convs_per_chunk
+        self.pretty = pretty
         self.output_dir = Path(output_dir) if output_dir else self.input_file.parent / f"{self.input_file.stem}_chunks"
         self.output_dir.mkdir(exist_ok=True)
     
     def split(self):
         print(f"Loading: {self.input_file.name}")
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if isinstance(data, dict) and 'conversations' in data:
-            conversations = data['conversations']
-        elif isinstance(data, list):
-            conversations = data
-        else:
-            raise ValueError("Unable to find conversations array")
-        
-        total_convs = len(conversations)
-        total_chunks = (total_convs + self.convs_per_chunk - 1) // self.convs_per_chunk
-        
-        for chunk_num in range(total_chunks):
-            start_idx = chunk_num * self.convs_per_chunk
-            end_idx = min(start_idx + self.convs_per_chunk, total_convs)
-            chunk_convs = conversations[start_idx:end_idx]
+        with open(self.input_file, 'rb') as f:
+            is_list = self._peek_top_level(f) == b'['
+            if ijson is not None:
+                # Stream one conversation at a time instead of loading the whole export
+                conversations = ijson.items(f, 'item' if is_list else 'conversations.item', use_float=True)
+            else:
+                data = json.load(f)
+                if is_list:
+                    conversations = data
+                elif isinstance(data, dict) and 'conversations' in data:
+                    conversations = data['conversations']
+                else:
+                    raise ValueError("Unable to find conversations array")
+            
+            chunk_num = 0
+            buffer = []
+            slots = threading.BoundedSemaphore(WRITE_WORKERS * 2)
+            futures = []
+            
+            def submit(num: int, chunk: list):
+                slots.acquire()
+                future = pool.submit(self._write_chunk, num, chunk, is_list)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+            
+            with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as pool:
+                for conv in conversations:
+                    buffer.append(conv)
+                    if len(buffer) == self.convs_per_chunk:
+                        chunk_num += 1
+                        submit(chunk_num, buffer)
+                        buffer = []
+                if buffer:
+                    chunk_num += 1
+                    submit(chunk_num, buffer)
             
-            output_file = self.output_dir / f"chunk_{chunk_num + 1:04d}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(chunk_convs if isinstance(data, list) else {'conversations': chunk_convs}, f, indent=2)
-            print(f"Created chunk {chunk_num + 1}: {len(chunk_convs)} conversations")
+            # Surface any write error
+            for future in futures:
+                future.result()
+            
+            # No items streamed: an empty "conversations" array is fine, a missing one is not
+            if chunk_num == 0 and ijson is not None and not is_list and not self._has_conversations(f):
+                raise ValueError("Unable to find conversations array")
+    
+    @staticmethod
+    def _has_conversations(f) -> bool:
+        """Whether the top-level object has a "conversations" array"""
+        f.seek(0)
+        return any(isinstance(value, list) for value in ijson.items(f, 'conversations', use_float=True))
+    
+    @staticmethod
+    def _peek_top_level(f) -> bytes:
+        """Return the first non-whitespace byte and rewind"""
+        head = f.read(4096).lstrip(b'\xef\xbb\xbf \t\r\n')
+        f.seek(0)
+        return head[:1]
+    
+    def _write_chunk(self, chunk_num: int, chunk_convs: list, is_list: bool):
+        output_file = self.output_dir / f"chunk_{chunk_num:04d}.json"
+        payload = chunk_convs if is_list else {'conversations': chunk_convs}
+        with open(output_file, 'wb') as f:
+            f.write(self._dumps(payload))
+        # Single write so lines from concurrent writers don't interleave
+        sys.stdout.write(f"Created chunk {chunk_num}: {len(chunk_convs)} conversations\n")
+    
+    def _dumps(self, payload) -> bytes:
+        """Compact JSON by default; chunks are re-parsed by tools, not read by people"""
+        if orjson is not None:
+            return orjson.dumps(payload, option=orjson.OPT_INDENT_2 if self.pretty else 0)
+        if self.pretty:
+            return json.dumps(payload, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Split conversation JSON files')
     parser.add_argument('input_file', help='Input JSON file')
     parser.add_argument('--conversations-per-chunk', type=int, default=50)
     parser.add_argument('--output-dir', type=str, default=None)
+    parser.add_argument('--pretty', action='store_true', help='Indent output JSON')
     args = parser.parse_args()
     
-    splitter = ConversationSplitter(args.input_file, args.conversations_per_chunk, args.output_dir)
+    splitter = ConversationSplitter(args.input_file, args.conversations_per_chunk, args.output_dir, args.pretty)
     splitter.split()
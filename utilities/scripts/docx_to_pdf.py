@@ -3,22 +3,132 @@
 DOCX to PDF Batch Converter
 
 Usage:
-python docx_to_pdf.py <directory>
+python docx_to_pdf.py <directory> [--port N]
+
+Uses a single warm LibreOffice through unoserver when it is installed; any
+file it cannot convert is retried with soffice.
+Otherwise files are split into shards, and each shard is converted by one
+`soffice --headless` call with its own user profile, so several
+LibreOffice instances can run side by side.
 """
 
+import argparse
+import os
+import shutil
+import socket
+import subprocess
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Optional
+
+try:
+    from unoserver.client import UnoClient
+except ImportError:
+    UnoClient = None
+
+# At or below this many files one soffice process handles the whole batch
+PARALLEL_MIN_FILES = 4
+MAX_WORKERS = 8
+UNO_STARTUP_TIMEOUT_S = 30
+
+def soffice_binary() -> str:
+    return shutil.which('soffice') or shutil.which('libreoffice')
+
+def convert_shard(soffice: str, docx_files: List[str], outdir: str) -> int:
+    """Convert a shard in one soffice start-up; a private profile lets instances run concurrently"""
+    with tempfile.TemporaryDirectory(prefix='lo_profile_') as profile:
+        result = subprocess.run(
+            [soffice, f'-env:UserInstallation={Path(profile).as_uri()}',
+             '--headless', '--convert-to', 'pdf', '--outdir', outdir, *docx_files],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    if result.returncode != 0:
+        print(f"soffice failed: {result.stderr.strip()}", file=sys.stderr)
+    return result.returncode
+
+def convert_with_soffice(docx_files: List[str], outdir: str) -> bool:
+    soffice = soffice_binary()
+    if soffice is None:
+        print("LibreOffice not found. Install it so `soffice` is on PATH.", file=sys.stderr)
+        return False
+    
+    if len(docx_files) <= PARALLEL_MIN_FILES:
+        return convert_shard(soffice, docx_files, outdir) == 0
+    
+    # The work happens in the soffice children, so threads are enough to drive them
+    workers = min(MAX_WORKERS, os.cpu_count() or 1, len(docx_files))
+    size = -(-len(docx_files) // workers)
+    shards = [docx_files[i:i + size] for i in range(0, len(docx_files), size)]
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        codes = list(pool.map(lambda shard: convert_shard(soffice, shard, outdir), shards))
+    return not any(codes)
+
+def _free_port() -> int:
+    """A currently unused localhost port, so we never collide with a running unoserver"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def convert_with_unoserver(docx_files: List[str], outdir: str, port: Optional[int] = None) -> List[str]:
+    """Start one unoserver and send each file to it; returns the files it did not convert"""
+    if UnoClient is None or shutil.which('unoserver') is None:
+        return docx_files
+    
+    port = port or _free_port()
+    server = subprocess.Popen(
+        ['unoserver', '--interface', '127.0.0.1', '--port', str(port), '--uno-port', str(_free_port())],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        client = UnoClient(server='127.0.0.1', port=str(port))
+        deadline = time.monotonic() + UNO_STARTUP_TIMEOUT_S
+        failed = []
+        for i, docx in enumerate(docx_files):
+            outpath = os.path.join(outdir, Path(docx).stem + '.pdf')
+            while True:
+                try:
+                    client.convert(inpath=docx, outpath=outpath)
+                    print(f"Converted: {os.path.basename(docx)}")
+                    break
+                except ConnectionRefusedError:
+                    # Server still starting up, or gone
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        print("unoserver unavailable; falling back to soffice", file=sys.stderr)
+                        return failed + docx_files[i:]
+                    time.sleep(0.5)
+                except Exception as e:
+                    # xmlrpc Fault or I/O error for this file only; soffice retries it
+                    print(f"unoserver failed on {os.path.basename(docx)}: {e}", file=sys.stderr)
+                    failed.append(docx)
+                    break
+        return failed
+    finally:
+        server.terminate()
+        server.wait()
 
-def convert_docx_to_pdf(directory: str):
+def convert_docx_to_pdf(directory: str, port: Optional[int] = None):
     print(f"Converting DOCX files in {directory} to PDF...")
-    docx_files = list(Path(directory).glob('*.docx'))
+    docx_files = [str(p) for p in Path(directory).glob('*.docx')]
     print(f"Found {len(docx_files)} DOCX files")
-    # Conversion logic would go here
-    for docx in docx_files:
-        print(f"Would convert: {docx.name}")
+    if not docx_files:
+        return True
+    
+    remaining = convert_with_unoserver(docx_files, directory, port)
+    if not remaining:
+        return True
+    return convert_with_soffice(remaining, directory)
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python docx_to_pdf.py <directory>")
-        sys.exit(1)
-    convert_docx_to_pdf(sys.argv[1])
+    parser = argparse.ArgumentParser(description='Batch convert DOCX files to PDF')
+    parser.add_argument('directory', help='Directory with DOCX files')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Port for the unoserver started for this batch (default: a free port)')
+    args = parser.parse_args()
+    
+    sys.exit(0 if convert_docx_to_pdf(args.directory, args.port) else 1)
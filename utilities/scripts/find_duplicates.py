@@ -7,27 +7,214 @@ Usage:
 python find_duplicates.py <directory>
 """
 
+import filecmp
 import hashlib
+import mmap
+import os
 import sys
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from collections import defaultdict
+from itertools import repeat
 
-def hash_file(filepath: Path) -> str:
-    hasher = hashlib.sha256()
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Fixed read size keeps memory flat regardless of file size
+READ_CHUNK = 1 << 20
+# Below this many files, process startup costs more than parallel hashing saves
+PARALLEL_MIN_FILES = 32
+# Files below this (and over READ_CHUNK) are hashed from a mmap in one update
+MMAP_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# While hashing a file, readahead is requested for the next PREFETCH_DEPTH
+# files, up to PREFETCH_BYTES of each, so I/O overlaps the hashing
+PREFETCH_DEPTH = 8
+PREFETCH_BYTES = 8 * 1024 * 1024
+# Files per worker task
+BATCH_SIZE = 16
+
+def _read_small(filepath: str):
+    """(contents, size): contents via one raw read if the file fits in READ_CHUNK, else None"""
+    fd = os.open(filepath, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size > READ_CHUNK:
+            return None, size
+        return os.read(fd, READ_CHUNK), size
+    finally:
+        os.close(fd)
+
+def _fadvise(fd: int, advice: str):
+    """posix_fadvise over the whole file where the platform has it"""
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+
+def drop_cached(filepath: str):
+    """Release a file's page-cache pages once nothing will read it again"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def _update_mmap(hasher, filepath: str, drop_cache: bool):
+    """Hash the whole file straight from the page cache in a single update call"""
     with open(filepath, 'rb') as f:
-        hasher.update(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            hasher.update(mm)
+        if drop_cache:
+            _fadvise(f.fileno(), 'POSIX_FADV_DONTNEED')
+
+def _digest(hasher, filepath: str, drop_cache: bool = True) -> str:
+    """Feed filepath to hasher by the cheapest read for its size; returns the hex digest
+
+    Only the last pass over a file should drop its pages (drop_cache).
+    """
+    data, size = _read_small(filepath)
+    if data is not None:
+        hasher.update(data)
+        return hasher.hexdigest()
+    if size < MMAP_MAX_BYTES:
+        _update_mmap(hasher, filepath, drop_cache)
+        return hasher.hexdigest()
+    # Unbuffered reads: file_digest (3.11+) reads into its own 256 KiB buffer
+    # and hashes with the GIL released, so threads run in parallel
+    with open(filepath, 'rb', buffering=0) as f:
+        # Full readahead while hashing
+        _fadvise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+        if hasattr(hashlib, 'file_digest'):
+            hashlib.file_digest(f, lambda: hasher)
+        else:
+            for block in iter(lambda: f.read(READ_CHUNK), b''):
+                hasher.update(block)
+        if drop_cache:
+            _fadvise(f.fileno(), 'POSIX_FADV_DONTNEED')
     return hasher.hexdigest()
 
+def hash_file(filepath: str) -> str:
+    """SHA-256 as the only pass over a file"""
+    return _digest(hashlib.sha256(), filepath)
+
+def confirm_hash_file(filepath: str) -> str:
+    """SHA-256 as the last pass, over pages the clustering pass just cached"""
+    return _digest(hashlib.sha256(), filepath)
+
+def fast_hash_file(filepath: str) -> str:
+    """Non-cryptographic xxh3_128 for clustering; SHA-256 when xxhash is unavailable"""
+    if xxhash is None:
+        return hash_file(filepath)
+    # Keep the pages: files that cluster are read again for confirmation
+    return _digest(xxhash.xxh3_128(), filepath, drop_cache=False)
+
+def _willneed(item):
+    """Start kernel readahead on a path (or each path of a pair) without waiting for it"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for filepath in (item if isinstance(item, tuple) else (item,)):
+        try:
+            fd = os.open(filepath, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, PREFETCH_BYTES, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+def hash_batch(hash_fn, files: list) -> list:
+    """Apply hash_fn to files in order, keeping a readahead window PREFETCH_DEPTH files ahead"""
+    for f in files[:PREFETCH_DEPTH]:
+        _willneed(f)
+    results = []
+    for i, f in enumerate(files):
+        if i + PREFETCH_DEPTH < len(files):
+            _willneed(files[i + PREFETCH_DEPTH])
+        results.append(hash_fn(f))
+    return results
+
+def hash_all(hash_fn, files: list, executor=ProcessPoolExecutor) -> list:
+    """Apply hash_fn to files in order, across a worker pool when there are enough of them"""
+    if len(files) <= PARALLEL_MIN_FILES:
+        return hash_batch(hash_fn, files)
+    batches = [files[i:i + BATCH_SIZE] for i in range(0, len(files), BATCH_SIZE)]
+    with executor(max_workers=os.cpu_count()) as pool:
+        return [result for batch in pool.map(hash_batch, repeat(hash_fn), batches) for result in batch]
+
+def same_contents(pair: tuple) -> bool:
+    """Byte-compare two files, stopping at the first difference"""
+    return filecmp.cmp(pair[0], pair[1], shallow=False)
+
+class CachedEntry:
+    """DirEntry wrapper that stats at most once, shared by every filter stage"""
+    __slots__ = ('entry', '_stat')
+
+    def __init__(self, entry: os.DirEntry):
+        self.entry = entry
+        self._stat = None
+
+    @property
+    def path(self) -> str:
+        return self.entry.path
+
+    def stat(self) -> os.stat_result:
+        if self._stat is None:
+            self._stat = self.entry.stat(follow_symlinks=False)
+        return self._stat
+
+def walk_files(directory: str):
+    """Yield a CachedEntry per regular file; d_type from getdents avoids a stat per entry"""
+    stack = [directory]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield CachedEntry(entry)
+        except OSError as e:
+            print(f"Skipping {e.filename}: {e.strerror}", file=sys.stderr)
+
 def find_duplicates(directory: str):
-    hashes = defaultdict(list)
-    for file in Path(directory).rglob('*'):
-        if file.is_file():
-            file_hash = hash_file(file)
-            hashes[file_hash].append(file)
+    # Only files that share a size can be duplicates; unique sizes are never read
+    sizes = defaultdict(list)
+    for entry in walk_files(directory):
+        sizes[entry.stat().st_size].append(entry)
+    
+    # A pair is settled by one byte compare, which usually stops early on a mismatch
+    pairs = [(group[0].path, group[1].path) for group in sizes.values() if len(group) == 2]
+    duplicates = [list(pair) for pair, same in zip(pairs, hash_all(same_contents, pairs)) if same]
+    
+    # Cluster larger same-size groups by a cheap hash first (workers get plain paths)
+    candidates = [(size, entry.path) for size, group in sizes.items() if len(group) > 2 for entry in group]
+    clusters = defaultdict(list)
+    for (size, file), digest in zip(candidates, hash_all(fast_hash_file, [f for _, f in candidates])):
+        clusters[(size, digest)].append(file)
+    
+    # Confirm xxh3 clusters with SHA-256 (already SHA-256 without xxhash).
+    # file_digest releases the GIL, so threads suffice and skip process startup
+    if xxhash is None:
+        hashes = {key: group for key, group in clusters.items() if len(group) > 1}
+    else:
+        # Files alone in their cluster are not read again: release their pages now
+        for group in clusters.values():
+            if len(group) == 1:
+                drop_cached(group[0])
+        candidates = [(size, file) for (size, _), group in clusters.items() if len(group) > 1 for file in group]
+        hashes = defaultdict(list)
+        for (size, file), digest in zip(candidates, hash_all(confirm_hash_file, [f for _, f in candidates], ThreadPoolExecutor)):
+            hashes[(size, digest)].append(file)
     
-    duplicates = {h: files for h, files in hashes.items() if len(files) > 1}
+    duplicates.extend(files for files in hashes.values() if len(files) > 1)
     print(f"Found {len(duplicates)} duplicate groups")
-    for files in duplicates.values():
+    for files in duplicates:
         print(f"\nDuplicates:")
         for f in files:
             print(f"  {f}")
@@ -6,34 +6,202 @@ Validates parser output JSONL files.
 Usage:
 python output_schemas.py <file.jsonl> <type>
 Types: conversation, entity, artifact
+
+Record schemas are JSON Schema dicts compiled once with fastjsonschema when
+it is installed; otherwise only required fields are checked.
 """
 
 import json
+import os
 import sys
-from typing import Dict, Any, List
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Any, List, Tuple
 from dataclasses import dataclass
 
-@dataclass
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# Files smaller than this are validated in-process
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+CONVERSATION_SCHEMA = {
+    "type": "object",
+    "required": ["message_hash", "conversation_id", "platform", "timestamp", "turn_type", "content"],
+    "properties": {
+        "message_hash": {"type": "string"},
+        "conversation_id": {"type": "string"},
+        "platform": {"type": "string"},
+        "timestamp": {"type": "string"},
+        "turn_type": {"type": "string"},
+        "content": {"type": "string"},
+        "raw_metadata": {"type": "object"},
+    },
+}
+
+ENTITY_SCHEMA = {
+    "type": "object",
+    "required": ["entity_id", "type", "name", "confidence", "mention_count"],
+    "properties": {
+        "entity_id": {"type": "string"},
+        "type": {"type": "string"},
+        "name": {"type": "string"},
+        "aliases": {"type": "array", "items": {"type": "string"}},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+        "first_mention": {"type": "object"},
+        "mention_count": {"type": "integer", "minimum": 0},
+        "extraction_method": {"type": "string"},
+    },
+}
+
+ARTIFACT_SCHEMA = {
+    "type": "object",
+    "required": ["artifact_id", "type", "language", "content", "content_hash"],
+    "properties": {
+        "artifact_id": {"type": "string"},
+        "type": {"type": "string"},
+        "language": {"type": "string"},
+        "content": {"type": "string"},
+        "content_hash": {"type": "string"},
+        "context": {"type": "string"},
+        "source_message": {"type": "string"},
+        "timestamp": {"type": "string"},
+        "metadata": {"type": "object"},
+    },
+}
+
+SCHEMAS = {
+    "conversation": CONVERSATION_SCHEMA,
+    "entity": ENTITY_SCHEMA,
+    "artifact": ARTIFACT_SCHEMA,
+}
+
+@dataclass(slots=True, frozen=True)
 class SchemaValidationError:
     field: str
     message: str
     value: Any
 
 class OutputValidator:
+    _REQUIRED_TURN = tuple(CONVERSATION_SCHEMA["required"])
+    _REQUIRED_TURN_SET = frozenset(_REQUIRED_TURN)
+    _REQUIRED_ENTITY = tuple(ENTITY_SCHEMA["required"])
+    _REQUIRED_ENTITY_SET = frozenset(_REQUIRED_ENTITY)
+    _REQUIRED_ARTIFACT = tuple(ARTIFACT_SCHEMA["required"])
+    _REQUIRED_ARTIFACT_SET = frozenset(_REQUIRED_ARTIFACT)
+
+    @staticmethod
+    def _missing(data: Any, required: Tuple[str, ...], required_set: frozenset) -> List[SchemaValidationError]:
+        if not isinstance(data, dict):
+            return [SchemaValidationError("", "Record must be an object", data)]
+        missing = required_set - data.keys()
+        if not missing:
+            return []
+        return [
+            SchemaValidationError(field, "Missing required field", None)
+            for field in required if field in missing
+        ]
+
     @staticmethod
     def validate_conversation_turn(data: Dict[str, Any]) -> List[SchemaValidationError]:
-        errors = []
-        required = ["message_hash", "conversation_id", "platform", "timestamp", "turn_type", "content"]
-        for field in required:
-            if field not in data:
-                errors.append(SchemaValidationError(field, "Missing required field", None))
-        return errors
+        return OutputValidator._missing(data, OutputValidator._REQUIRED_TURN, OutputValidator._REQUIRED_TURN_SET)
+
+    @staticmethod
+    def validate_entity(data: Dict[str, Any]) -> List[SchemaValidationError]:
+        return OutputValidator._missing(data, OutputValidator._REQUIRED_ENTITY, OutputValidator._REQUIRED_ENTITY_SET)
+
+    @staticmethod
+    def validate_artifact(data: Dict[str, Any]) -> List[SchemaValidationError]:
+        return OutputValidator._missing(data, OutputValidator._REQUIRED_ARTIFACT, OutputValidator._REQUIRED_ARTIFACT_SET)
+
+def compile_validator(schema: Dict[str, Any]):
+    """Generate a specialised validator for schema; returns data -> [errors]"""
+    validate = fastjsonschema.compile(schema)
+
+    def check(data: Any) -> List[SchemaValidationError]:
+        try:
+            validate(data)
+        except fastjsonschema.JsonSchemaValueException as e:
+            return [SchemaValidationError(e.name.removeprefix("data").lstrip("."), e.message, e.value)]
+        return []
+
+    return check
+
+if fastjsonschema is not None:
+    VALIDATORS = {name: compile_validator(schema) for name, schema in SCHEMAS.items()}
+else:
+    VALIDATORS = {
+        "conversation": OutputValidator.validate_conversation_turn,
+        "entity": OutputValidator.validate_entity,
+        "artifact": OutputValidator.validate_artifact,
+    }
+
+def validate_range(filepath: str, record_type: str, start: int, end: int) -> Tuple[int, List[Tuple[int, List[SchemaValidationError]]]]:
+    """Validate the lines beginning in [start, end); returns (line_count, [(local_line, errors)])"""
+    validate = VALIDATORS[record_type]
+    failures = []
+    count = 0
+    with open(filepath, 'rb') as f:
+        if start:
+            # Skip the partial line; it belongs to the previous shard
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            count += 1
+            if not line.strip():
+                continue
+            try:
+                errors = validate(loads(line))
+            except ValueError as e:
+                errors = [SchemaValidationError("", f"Invalid JSON: {e}", None)]
+            if errors:
+                failures.append((count, errors))
+    return count, failures
+
+def validate_file(filepath: str, record_type: str) -> Tuple[int, List[Tuple[int, List[SchemaValidationError]]]]:
+    """Validate a JSONL file, sharding byte ranges across processes for large files"""
+    size = os.path.getsize(filepath)
+    workers = os.cpu_count() or 1
+    if size < PARALLEL_MIN_BYTES or workers == 1:
+        return validate_range(filepath, record_type, 0, size)
+
+    step = -(-size // workers)
+    starts = list(range(0, size, step))
+    ends = starts[1:] + [size]
+    total = 0
+    failures = []
+    with ProcessPoolExecutor(max_workers=len(starts)) as pool:
+        for count, shard_failures in pool.map(validate_range, repeat(filepath), repeat(record_type), starts, ends):
+            failures.extend((total + line, errors) for line, errors in shard_failures)
+            total += count
+    return total, failures
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("Usage: python output_schemas.py <file.jsonl> <type>")
         sys.exit(1)
-    
+
     filepath = sys.argv[1]
     record_type = sys.argv[2]
+    if record_type not in VALIDATORS:
+        print(f"No validator for record type: {record_type}")
+        sys.exit(1)
     print(f"Validating {filepath} as {record_type} records...")
+
+    total, failures = validate_file(filepath, record_type)
+    for line, errors in failures:
+        for error in errors:
+            print(f"  line {line}: {error.field}: {error.message}")
+    print(f"Validated {total} records, {len(failures)} invalid")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,96 @@
+import io
+
+import pytest
+
+import clean_markdown_converter as cmc
+
+SOURCE = (
+    b'# Title \t\r\n'
+    b'line one  \n'
+    b'line two \t\n'
+    b'\xe2\x80\x9cquoted\xe2\x80\x9d text\xe2\x80\x8b\n'
+    b'\n'
+    b'\n'
+    b'\n'
+    b'```python\n'
+    b'x = \xe2\x80\x9cq\xe2\x80\x9d  \n'
+    b'\n'
+    b'\n'
+    b'\n'
+    b'y = 1 \t\n'
+    b'```\n'
+    b'\n'
+    b'\n'
+    b'\n'
+    b'~~~~\n'
+    b'```\n'
+    b'still code \n'
+    b'~~~~~\n'
+    b'last  \n'
+)
+
+EXPECTED = (
+    b'# Title\n'
+    b'line one  \n'
+    b'line two\n'
+    b'"quoted" text\n'
+    b'\n'
+    b'```python\n'
+    b'x = \xe2\x80\x9cq\xe2\x80\x9d  \n'
+    b'\n'
+    b'\n'
+    b'\n'
+    b'y = 1 \t\n'
+    b'```\n'
+    b'\n'
+    b'~~~~\n'
+    b'```\n'
+    b'still code \n'
+    b'~~~~~\n'
+    b'last  \n'
+)
+
+@pytest.fixture(params=['hyperscan', 're'])
+def engine(request, monkeypatch):
+    if request.param == 'hyperscan' and cmc.HS_DATABASES is None:
+        pytest.skip('hyperscan not installed')
+    if request.param == 're':
+        monkeypatch.setattr(cmc, 'HS_DATABASES', None)
+    return request.param
+
+def clean(data: bytes) -> bytes:
+    out = io.BytesIO()
+    cmc.clean_stream(io.BytesIO(data), out)
+    return out.getvalue()
+
+def test_keeps_hard_breaks_and_code_fences(engine):
+    assert clean(SOURCE) == EXPECTED
+
+def test_hard_break_survives(engine):
+    assert clean(b'line one  \nline two\n') == b'line one  \nline two\n'
+
+@pytest.mark.parametrize('data', [
+    SOURCE,
+    # NBSP turned space becomes trailing whitespace
+    b'line\xc2\xa0\nnext \xc2\xa0\n',
+    # Blank runs separated only by a zero-width space merge
+    b'a\n\n\n\xe2\x80\x8b\n\n\nb\n',
+    # A fence behind a zero-width space or NBSP is still a fence
+    b'\xe2\x80\x8b```\nx = 1  \n```\n\xc2\xa0~~~\n\n\n\n~~~\n',
+    b'lone\rcr\r```\nend\n',
+])
+def test_cleaning_is_idempotent(engine, data):
+    once = clean(data)
+    assert clean(once) == once
+
+def test_small_blocks_match_whole_file(engine, monkeypatch):
+    monkeypatch.setattr(cmc, 'READ_CHUNK', 16)
+    assert clean(SOURCE) == EXPECTED
+
+def test_clean_file_is_left_untouched(engine, tmp_path):
+    path = tmp_path / 'clean.md'
+    path.write_bytes(EXPECTED)
+    mtime = path.stat().st_mtime_ns
+    cmc.clean_markdown(str(path))
+    assert path.read_bytes() == EXPECTED
+    assert path.stat().st_mtime_ns == mtime